@@ -0,0 +1,537 @@
+from backend.logic import (
+    ZOBRIST_BLACK_TO_MOVE,
+    ZOBRIST_CASTLING,
+    ZOBRIST_EN_PASSANT,
+    ZOBRIST_PIECES,
+)
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+PIECE_NAMES = ["wP", "wN", "wB", "wR", "wQ", "wK", "bP", "bN", "bB", "bR", "bQ", "bK"]
+FEN_CHARS = "PNBRQKpnbrqk"
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+PROMOTIONS = {"N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN}
+CASTLING_BITS = (("wK", 1, "K"), ("wQ", 2, "Q"), ("bK", 4, "k"), ("bQ", 8, "q"))
+ROOK_CASTLING_SQUARES = {62: (63, 61), 58: (56, 59), 6: (7, 5), 2: (0, 3)}
+PIECE_KEYS = [ZOBRIST_PIECES[name] for name in PIECE_NAMES]
+CASTLING_KEYS = [0] * 16
+for _mask in range(16):
+    for _name, _bit, _ in CASTLING_BITS:
+        if _mask & _bit:
+            CASTLING_KEYS[_mask] ^= ZOBRIST_CASTLING[_name]
+FULL_MASK = (1 << 64) - 1
+CASTLING_MASKS = [15] * 64
+CASTLING_MASKS[60] = 15 & ~3
+CASTLING_MASKS[63] = 15 & ~1
+CASTLING_MASKS[56] = 15 & ~2
+CASTLING_MASKS[4] = 15 & ~12
+CASTLING_MASKS[7] = 15 & ~4
+CASTLING_MASKS[0] = 15 & ~8
+
+
+def _step_table(offsets):
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        bb = 0
+        for dr, dc in offsets:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < 8 and 0 <= nc < 8:
+                bb |= 1 << (nr * 8 + nc)
+        table.append(bb)
+    return table
+
+
+def _ray_table(dr, dc):
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        bb = 0
+        nr, nc = r + dr, c + dc
+        while 0 <= nr < 8 and 0 <= nc < 8:
+            bb |= 1 << (nr * 8 + nc)
+            nr, nc = nr + dr, nc + dc
+        table.append(bb)
+    return table
+
+
+KNIGHT_ATTACKS = _step_table(
+    [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]
+)
+KING_ATTACKS = _step_table(
+    [(1, 1), (1, -1), (-1, 1), (-1, -1), (1, 0), (-1, 0), (0, 1), (0, -1)]
+)
+PAWN_ATTACKS = (_step_table([(-1, -1), (-1, 1)]), _step_table([(1, -1), (1, 1)]))
+ROOK_RAYS = [
+    (_ray_table(dr, dc), dr * 8 + dc > 0)
+    for dr, dc in [(1, 0), (0, 1), (-1, 0), (0, -1)]
+]
+BISHOP_RAYS = [
+    (_ray_table(dr, dc), dr * 8 + dc > 0)
+    for dr, dc in [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+]
+
+
+def nearest(bits, positive):
+    if positive:
+        return (bits & -bits).bit_length() - 1
+    return bits.bit_length() - 1
+
+
+def segment(frm, to):
+    for ray, _ in ROOK_RAYS + BISHOP_RAYS:
+        if ray[frm] >> to & 1:
+            return ray[frm] ^ ray[to]
+    return 1 << to
+
+
+def slider_attacks(sq, occupied, rays):
+    attacks = 0
+    for ray, positive in rays:
+        line = ray[sq]
+        blockers = line & occupied
+        if blockers:
+            if positive:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            attacks |= line ^ ray[blocker]
+        else:
+            attacks |= line
+    return attacks
+
+
+def iter_bits(bb):
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+class BitboardState:
+    def __init__(self, fen=START_FEN, player_color=None):
+        if player_color is None:
+            from backend.chess_runner import color
+            player_color = color
+        self.player_color = player_color
+        self.set_fen(fen)
+
+    def set_fen(self, fen):
+        fields = fen.split()
+        self.bitboards = [0] * 12
+        for r, row in enumerate(fields[0].split("/")):
+            c = 0
+            for char in row:
+                if char.isdigit():
+                    c += int(char)
+                else:
+                    self.bitboards[FEN_CHARS.index(char)] |= 1 << (r * 8 + c)
+                    c += 1
+        self.occupancy = [0, 0]
+        for i, bb in enumerate(self.bitboards):
+            self.occupancy[i // 6] |= bb
+        self.side = 0 if fields[1] == "w" else 1
+        self.castling = 0
+        for _, bit, char in CASTLING_BITS:
+            if char in fields[2]:
+                self.castling |= bit
+        self.ep_square = None
+        if fields[3] != "-":
+            file = "abcdefgh".index(fields[3][0])
+            self.ep_square = (8 - int(fields[3][1])) * 8 + file
+        self.move_history = []
+        self.undo_stack = []
+        self.zobrist_key = self.compute_zobrist_key()
+        self.position_counts = {}
+        self._mailbox = None
+        self._legal_moves = None
+        self._legal_moves_key = None
+        self._count_position()
+
+    @property
+    def turn(self):
+        return "white" if self.side == 0 else "black"
+
+    @property
+    def en_passant(self):
+        if self.ep_square is None:
+            return None
+        return divmod(self.ep_square, 8)
+
+    @property
+    def castling_rights(self):
+        return {name: bool(self.castling & bit) for name, bit, _ in CASTLING_BITS}
+
+    @property
+    def board(self):
+        if self._mailbox is None:
+            squares = ["--"] * 64
+            for i, bb in enumerate(self.bitboards):
+                for sq in iter_bits(bb):
+                    squares[sq] = PIECE_NAMES[i]
+            self._mailbox = [squares[r * 8 : r * 8 + 8] for r in range(8)]
+        return self._mailbox
+
+    def piece_at(self, sq):
+        bit = 1 << sq
+        for i, bb in enumerate(self.bitboards):
+            if bb & bit:
+                return i
+        return -1
+
+    def move_piece(self, start, end, promo="Q", is_simulation=False):
+        if not is_simulation:
+            if end not in self.get_legal_moves(start):
+                return False
+        self.make_move(start[0] * 8 + start[1], end[0] * 8 + end[1], promo)
+        self._mailbox = None
+        self._legal_moves = None
+        if not is_simulation:
+            self._count_position()
+        return True
+
+    def make_move(self, frm, to, promo="Q"):
+        bb = self.bitboards
+        occ = self.occupancy
+        us = self.side
+        them = us ^ 1
+        base = us * 6
+        from_bit = 1 << frm
+        to_bit = 1 << to
+        piece = base
+        while not bb[piece] & from_bit:
+            piece += 1
+        captured = -1
+        capture_sq = to
+        if piece == base and to == self.ep_square:
+            capture_sq = to + 8 if us == 0 else to - 8
+            captured = them * 6
+        elif occ[them] & to_bit:
+            captured = them * 6
+            while not bb[captured] & to_bit:
+                captured += 1
+        promoted = -1
+        if piece == base and (to < 8 or to >= 56):
+            promoted = base + PROMOTIONS[promo]
+        self.undo_stack.append(
+            (
+                frm,
+                to,
+                piece,
+                captured,
+                capture_sq,
+                promoted,
+                self.ep_square,
+                self.castling,
+                self.zobrist_key,
+            )
+        )
+        key = self.zobrist_key ^ ZOBRIST_BLACK_TO_MOVE ^ PIECE_KEYS[piece][frm]
+        if captured >= 0:
+            capture_bit = 1 << capture_sq
+            bb[captured] ^= capture_bit
+            occ[them] ^= capture_bit
+            key ^= PIECE_KEYS[captured][capture_sq]
+        bb[piece] ^= from_bit | to_bit
+        occ[us] ^= from_bit | to_bit
+        if promoted >= 0:
+            bb[piece] ^= to_bit
+            bb[promoted] |= to_bit
+            key ^= PIECE_KEYS[promoted][to]
+        else:
+            key ^= PIECE_KEYS[piece][to]
+        if piece == base + KING and abs(to - frm) == 2:
+            rook_from, rook_to = ROOK_CASTLING_SQUARES[to]
+            rook_bits = (1 << rook_from) | (1 << rook_to)
+            bb[base + ROOK] ^= rook_bits
+            occ[us] ^= rook_bits
+            key ^= PIECE_KEYS[base + ROOK][rook_from] ^ PIECE_KEYS[base + ROOK][rook_to]
+        if self.ep_square is not None:
+            key ^= ZOBRIST_EN_PASSANT[self.ep_square & 7]
+        if piece == base and abs(to - frm) == 16:
+            self.ep_square = (frm + to) // 2
+            key ^= ZOBRIST_EN_PASSANT[frm & 7]
+        else:
+            self.ep_square = None
+        castling = self.castling & CASTLING_MASKS[frm] & CASTLING_MASKS[to]
+        self.zobrist_key = key ^ CASTLING_KEYS[self.castling] ^ CASTLING_KEYS[castling]
+        self.castling = castling
+        self.side = them
+        self.move_history.append((divmod(frm, 8), divmod(to, 8)))
+
+    def unmake_move(self):
+        (
+            frm,
+            to,
+            piece,
+            captured,
+            capture_sq,
+            promoted,
+            ep_square,
+            castling,
+            zobrist_key,
+        ) = self.undo_stack.pop()
+        bb = self.bitboards
+        occ = self.occupancy
+        them = self.side
+        us = them ^ 1
+        base = us * 6
+        from_bit = 1 << frm
+        to_bit = 1 << to
+        if promoted >= 0:
+            bb[promoted] ^= to_bit
+            bb[piece] |= to_bit
+        bb[piece] ^= from_bit | to_bit
+        occ[us] ^= from_bit | to_bit
+        if captured >= 0:
+            capture_bit = 1 << capture_sq
+            bb[captured] |= capture_bit
+            occ[them] |= capture_bit
+        if piece == base + KING and abs(to - frm) == 2:
+            rook_from, rook_to = ROOK_CASTLING_SQUARES[to]
+            rook_bits = (1 << rook_from) | (1 << rook_to)
+            bb[base + ROOK] ^= rook_bits
+            occ[us] ^= rook_bits
+        self.ep_square = ep_square
+        self.castling = castling
+        self.zobrist_key = zobrist_key
+        self.side = us
+        self.move_history.pop()
+
+    def attacked(self, sq, by, occupied=None):
+        bb = self.bitboards
+        base = by * 6
+        if PAWN_ATTACKS[by ^ 1][sq] & bb[base]:
+            return True
+        if KNIGHT_ATTACKS[sq] & bb[base + KNIGHT]:
+            return True
+        if KING_ATTACKS[sq] & bb[base + KING]:
+            return True
+        if occupied is None:
+            occupied = self.occupancy[0] | self.occupancy[1]
+        diagonal = bb[base + BISHOP] | bb[base + QUEEN]
+        if diagonal and slider_attacks(sq, occupied, BISHOP_RAYS) & diagonal:
+            return True
+        straight = bb[base + ROOK] | bb[base + QUEEN]
+        if straight and slider_attacks(sq, occupied, ROOK_RAYS) & straight:
+            return True
+        return False
+
+    def square_under_attack(self, r, c, color):
+        return self.attacked(r * 8 + c, 1 if color == "white" else 0)
+
+    def king_in_check(self, color):
+        side = 0 if color == "white" else 1
+        king = self.bitboards[side * 6 + KING]
+        if not king:
+            return False
+        return self.attacked(king.bit_length() - 1, side ^ 1)
+
+    def pseudo_targets(self, frm, piece):
+        us = self.side
+        own = self.occupancy[us]
+        enemy = self.occupancy[us ^ 1]
+        occupied = own | enemy
+        kind = piece - us * 6
+        if kind == PAWN:
+            targets = PAWN_ATTACKS[us][frm] & enemy
+            if self.ep_square is not None and PAWN_ATTACKS[us][frm] >> self.ep_square & 1:
+                targets |= 1 << self.ep_square
+            step = -8 if us == 0 else 8
+            one = frm + step
+            if not occupied >> one & 1:
+                targets |= 1 << one
+                two = one + step
+                if (frm >> 3) == (6 if us == 0 else 1) and not occupied >> two & 1:
+                    targets |= 1 << two
+            return targets
+        if kind == KNIGHT:
+            return KNIGHT_ATTACKS[frm] & ~own
+        if kind == BISHOP:
+            return slider_attacks(frm, occupied, BISHOP_RAYS) & ~own
+        if kind == ROOK:
+            return slider_attacks(frm, occupied, ROOK_RAYS) & ~own
+        if kind == QUEEN:
+            return (
+                slider_attacks(frm, occupied, BISHOP_RAYS)
+                | slider_attacks(frm, occupied, ROOK_RAYS)
+            ) & ~own
+        targets = KING_ATTACKS[frm] & ~own
+        them = us ^ 1
+        if us == 0 and frm == 60:
+            if self.castling & 1 and not occupied & 0x6000000000000000:
+                if not self.attacked(60, them) and not self.attacked(61, them):
+                    targets |= 1 << 62
+            if self.castling & 2 and not occupied & 0x0E00000000000000:
+                if not self.attacked(60, them) and not self.attacked(59, them):
+                    targets |= 1 << 58
+        if us == 1 and frm == 4:
+            if self.castling & 4 and not occupied & 0x60:
+                if not self.attacked(4, them) and not self.attacked(5, them):
+                    targets |= 1 << 6
+            if self.castling & 8 and not occupied & 0x0E:
+                if not self.attacked(4, them) and not self.attacked(3, them):
+                    targets |= 1 << 2
+        return targets
+
+    def is_legal(self, frm, to):
+        side = self.side
+        self.make_move(frm, to)
+        king = self.bitboards[side * 6 + KING]
+        legal = not king or not self.attacked(king.bit_length() - 1, side ^ 1)
+        self.unmake_move()
+        return legal
+
+    def checkers(self, king, by, occupied):
+        bb = self.bitboards
+        base = by * 6
+        return (
+            PAWN_ATTACKS[by ^ 1][king] & bb[base]
+            | KNIGHT_ATTACKS[king] & bb[base + KNIGHT]
+            | slider_attacks(king, occupied, BISHOP_RAYS) & (bb[base + BISHOP] | bb[base + QUEEN])
+            | slider_attacks(king, occupied, ROOK_RAYS) & (bb[base + ROOK] | bb[base + QUEEN])
+        )
+
+    def pin_masks(self, king, own, occupied):
+        bb = self.bitboards
+        base = (self.side ^ 1) * 6
+        pins = {}
+        for rays, sliders in (
+            (ROOK_RAYS, bb[base + ROOK] | bb[base + QUEEN]),
+            (BISHOP_RAYS, bb[base + BISHOP] | bb[base + QUEEN]),
+        ):
+            if not sliders:
+                continue
+            for ray, positive in rays:
+                line = ray[king]
+                if not line & sliders:
+                    continue
+                blockers = line & occupied
+                first = nearest(blockers, positive)
+                if not own >> first & 1:
+                    continue
+                rest = blockers ^ (1 << first)
+                if rest and sliders >> nearest(rest, positive) & 1:
+                    pins[first] = line ^ ray[nearest(rest, positive)]
+        return pins
+
+    def legal_targets(self):
+        us = self.side
+        them = us ^ 1
+        base = us * 6
+        king_bb = self.bitboards[base + KING]
+        if not king_bb:
+            for piece in range(base, base + 6):
+                for frm in iter_bits(self.bitboards[piece]):
+                    yield piece, frm, self.pseudo_targets(frm, piece)
+            return
+        king = king_bb.bit_length() - 1
+        own = self.occupancy[us]
+        occupied = own | self.occupancy[them]
+        checkers = self.checkers(king, them, occupied)
+        if not checkers:
+            check_mask = FULL_MASK
+        elif checkers & (checkers - 1):
+            check_mask = 0
+        else:
+            check_mask = segment(king, checkers.bit_length() - 1)
+        if check_mask:
+            pins = self.pin_masks(king, own, occupied)
+            ep_bit = 1 << self.ep_square if self.ep_square is not None else 0
+            for piece in range(base, base + 5):
+                for frm in iter_bits(self.bitboards[piece]):
+                    pseudo = self.pseudo_targets(frm, piece)
+                    targets = pseudo & check_mask & pins.get(frm, FULL_MASK)
+                    if piece == base and pseudo & ep_bit:
+                        targets &= ~ep_bit
+                        if self.is_legal(frm, self.ep_square):
+                            targets |= ep_bit
+                    if targets:
+                        yield piece, frm, targets
+        without_king = occupied ^ king_bb
+        targets = 0
+        for to in iter_bits(self.pseudo_targets(king, base + KING)):
+            if not self.attacked(to, them, without_king):
+                targets |= 1 << to
+        if targets:
+            yield base + KING, king, targets
+
+    def generate_legal_moves(self):
+        base = self.side * 6
+        for piece, frm, targets in self.legal_targets():
+            for to in iter_bits(targets):
+                if piece == base and (to < 8 or to >= 56):
+                    for promo in "QRBN":
+                        yield frm, to, promo
+                else:
+                    yield frm, to, None
+
+    def get_legal_moves(self, pos):
+        return self.legal_moves().get(tuple(pos), [])
+
+    def legal_moves(self):
+        if self._legal_moves is None or self._legal_moves_key != self.zobrist_key:
+            moves = {}
+            for _, frm, targets in self.legal_targets():
+                moves[divmod(frm, 8)] = [divmod(to, 8) for to in iter_bits(targets)]
+            self._legal_moves = moves
+            self._legal_moves_key = self.zobrist_key
+        return self._legal_moves
+
+    def has_legal_moves(self):
+        return bool(self.legal_moves())
+
+    def checkmate(self):
+        if not self.king_in_check(self.turn):
+            return False
+        return not self.has_legal_moves()
+
+    def stalemate(self):
+        if self.king_in_check(self.turn):
+            return False
+        return not self.has_legal_moves()
+
+    def _count_position(self):
+        key = self.zobrist_key
+        self.position_counts[key] = self.position_counts.get(key, 0) + 1
+
+    def threefold_repetition(self):
+        return self.position_counts.get(self.zobrist_key, 0) >= 3
+
+    def compute_zobrist_key(self):
+        key = CASTLING_KEYS[self.castling]
+        for i, bb in enumerate(self.bitboards):
+            for sq in iter_bits(bb):
+                key ^= PIECE_KEYS[i][sq]
+        if self.ep_square is not None:
+            key ^= ZOBRIST_EN_PASSANT[self.ep_square & 7]
+        if self.side == 1:
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        return key
+
+    def get_board_string(self):
+        return " ".join(self.get_fen().split(" ")[:4])
+
+    def get_fen(self):
+        rows = []
+        for row in self.board:
+            fen = ""
+            empty = 0
+            for piece in row:
+                if piece == "--":
+                    empty += 1
+                    continue
+                if empty:
+                    fen += str(empty)
+                    empty = 0
+                fen += FEN_CHARS[PIECE_NAMES.index(piece)]
+            if empty:
+                fen += str(empty)
+            rows.append(fen)
+        turn = "w" if self.side == 0 else "b"
+        cast = "".join(c for _, bit, c in CASTLING_BITS if self.castling & bit) or "-"
+        ep = "-"
+        if self.ep_square is not None:
+            r, c = divmod(self.ep_square, 8)
+            ep = "abcdefgh"[c] + str(8 - r)
+        return f"{'/'.join(rows)} {turn} {cast} {ep} 0 1"
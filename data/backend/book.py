@@ -0,0 +1,102 @@
+import chess
+import chess.polyglot
+import os
+import random
+import struct
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+BOOK_PATH = os.path.join(ASSETS_DIR, "book.bin")
+
+BOOK_LINES = [
+    (10, "e4 e5 Nf3 Nc6 Bb5 a6 Ba4 Nf6 O-O Be7 Re1 b5 Bb3 d6"),
+    (5, "e4 e5 Nf3 Nc6 Bb5 Nf6 O-O Nxe4 d4 Nd6 Bxc6 dxc6 dxe5 Nf5"),
+    (8, "e4 e5 Nf3 Nc6 Bc4 Bc5 c3 Nf6 d3 d6 O-O O-O"),
+    (4, "e4 e5 Nf3 Nc6 d4 exd4 Nxd4 Nf6 Nxc6 bxc6 e5 Qe7"),
+    (3, "e4 e5 Nf3 Nf6 Nxe5 d6 Nf3 Nxe4 d4 d5 Bd3 Nc6"),
+    (1, "e4 e5 Nc3 Nf6 f4 d5 fxe5 Nxe4 Nf3 Be7"),
+    (1, "e4 e5 f4 exf4 Nf3 g5 h4 g4 Ne5 Nf6"),
+    (10, "e4 c5 Nf3 d6 d4 cxd4 Nxd4 Nf6 Nc3 a6 Be3 e5 Nb3 Be6"),
+    (4, "e4 c5 Nf3 d6 d4 cxd4 Nxd4 Nf6 Nc3 g6 Be3 Bg7 f3 O-O"),
+    (5, "e4 c5 Nf3 Nc6 d4 cxd4 Nxd4 Nf6 Nc3 e5 Ndb5 d6 Bg5 a6"),
+    (4, "e4 c5 Nf3 e6 d4 cxd4 Nxd4 Nc6 Nc3 Qc7 Be2 a6"),
+    (2, "e4 c5 Nc3 Nc6 g3 g6 Bg2 Bg7 d3 d6 f4 e6"),
+    (2, "e4 c5 c3 d5 exd5 Qxd5 d4 Nf6 Nf3 e6"),
+    (5, "e4 e6 d4 d5 Nc3 Nf6 Bg5 Be7 e5 Nfd7 Bxe7 Qxe7"),
+    (3, "e4 e6 d4 d5 Nd2 c5 exd5 Qxd5 Ngf3 cxd4 Bc4 Qd6"),
+    (5, "e4 c6 d4 d5 Nc3 dxe4 Nxe4 Bf5 Ng3 Bg6 h4 h6"),
+    (3, "e4 c6 d4 d5 e5 Bf5 Nf3 e6 Be2 c5"),
+    (2, "e4 d5 exd5 Qxd5 Nc3 Qa5 d4 Nf6 Nf3 c6"),
+    (2, "e4 d6 d4 Nf6 Nc3 g6 f4 Bg7 Nf3 O-O"),
+    (1, "e4 Nf6 e5 Nd5 d4 d6 Nf3 g6"),
+    (8, "d4 d5 c4 e6 Nc3 Nf6 Bg5 Be7 e3 O-O Nf3 h6"),
+    (6, "d4 d5 c4 c6 Nf3 Nf6 Nc3 dxc4 a4 Bf5 e3 e6"),
+    (3, "d4 d5 c4 dxc4 Nf3 Nf6 e3 e6 Bxc4 c5 O-O a6"),
+    (1, "d4 d5 c4 e6 Nc3 c5 cxd5 exd5 Nf3 Nc6"),
+    (4, "d4 d5 Nf3 Nf6 Bf4 e6 e3 c5 c3 Nc6"),
+    (7, "d4 Nf6 c4 e6 Nc3 Bb4 e3 O-O Bd3 d5 Nf3 c5"),
+    (3, "d4 Nf6 c4 e6 Nf3 b6 g3 Ba6 b3 Bb4+ Bd2 Be7"),
+    (7, "d4 Nf6 c4 g6 Nc3 Bg7 e4 d6 Nf3 O-O Be2 e5"),
+    (5, "d4 Nf6 c4 g6 Nc3 d5 cxd5 Nxd5 e4 Nxc3 bxc3 Bg7"),
+    (2, "d4 Nf6 c4 c5 d5 e6 Nc3 exd5 cxd5 d6"),
+    (1, "d4 f5 g3 Nf6 Bg2 g6 Nf3 Bg7 O-O O-O"),
+    (5, "c4 e5 Nc3 Nf6 Nf3 Nc6 g3 d5 cxd5 Nxd5"),
+    (3, "c4 c5 Nc3 Nc6 g3 g6 Bg2 Bg7 Nf3 Nf6"),
+    (1, "c4 Nf6 Nc3 e6 e4 d5 e5 d4"),
+    (4, "Nf3 d5 g3 Nf6 Bg2 e6 O-O Be7 d3 O-O"),
+    (3, "Nf3 Nf6 c4 g6 Nc3 Bg7 e4 d6 d4 O-O"),
+]
+
+
+def encode_move(board, move):
+    to_square = move.to_square
+    if board.is_castling(move):
+        rook_file = 7 if board.is_kingside_castling(move) else 0
+        to_square = chess.square(rook_file, chess.square_rank(move.from_square))
+    promotion = move.promotion - 1 if move.promotion else 0
+    return to_square | move.from_square << 6 | promotion << 12
+
+
+def write_book(path=BOOK_PATH, lines=BOOK_LINES):
+    weights = {}
+    for weight, line in lines:
+        board = chess.Board()
+        for san in line.split():
+            move = board.parse_san(san)
+            key = (chess.polyglot.zobrist_hash(board), encode_move(board, move))
+            weights[key] = weights.get(key, 0) + weight
+            board.push(move)
+    entries = sorted(weights.items(), key=lambda item: (item[0][0], -item[1]))
+    with open(path, "wb") as f:
+        for (key, move), weight in entries:
+            f.write(struct.pack(">QHHI", key, move, min(weight, 0xFFFF), 0))
+
+
+class OpeningBook:
+    def __init__(self, path=BOOK_PATH):
+        self.reader = None
+        if os.path.exists(path):
+            try:
+                self.reader = chess.polyglot.open_reader(path)
+            except Exception:
+                self.reader = None
+
+    def choose(self, board, temperature=1.0, min_share=0.0, rng=random):
+        if self.reader is None:
+            return None
+        entries = list(self.reader.find_all(board))
+        if not entries:
+            return None
+        cutoff = max(entry.weight for entry in entries) * min_share
+        entries = [entry for entry in entries if entry.weight >= cutoff]
+        weights = [entry.weight ** (1 / temperature) for entry in entries]
+        return rng.choices(entries, weights)[0].move
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+
+if __name__ == "__main__":
+    write_book()
@@ -1,15 +1,13 @@
 import customtkinter as ctk
 from ui.board import ChessGame
+from backend.engine import engine_dir, get_stockfish_path
 import os
 import platform
 import urllib.request
 import zipfile
 import stat
 
-def main():
-    def engine_dir():
-        return os.path.join(os.getcwd(), "engine")
-    
+def main(engine_manager=None):
     def get_release_url():
         system = platform.system()
         machine = platform.machine().lower()
@@ -25,24 +23,6 @@ def main():
         else:
             raise Exception("Unsupported Operating System")
         
-    def get_stockfish_path():
-        base = engine_dir()
-        system = platform.system()
-        machine = platform.machine().lower()
-        if system == "Windows":
-            return os.path.join(
-                base, "engine_windows", "stockfish-windows-x86-64-avx2.exe"
-            )
-        elif system == "Linux":
-            return os.path.join(base, "engine_linux", "stockfish-ubuntu-x86-64-avx2")
-        elif system == "Darwin":
-            if "arm" in machine or "aarch64" in machine:
-                return os.path.join(base, "engine_mac_m", "stockfish-macos-m1")
-            else:
-                return os.path.join(base, "engine_mac_intel", "stockfish-macos-intel")
-        else:
-            raise Exception("Unsupported Operating System")
-        
     def download_and_extract():
         os.makedirs(engine_dir(), exist_ok=True)
         url = get_release_url()
@@ -64,7 +44,7 @@ def main():
             os.chmod(path, st.st_mode | stat.S_IEXEC)
 
     app = ctk.CTk()
-    app.geometry("400x300")
+    app.geometry("400x390")
     app.title("Chess Configuration")
     app.resizable(False, False)
     ctk.set_appearance_mode("Dark")
@@ -94,6 +74,12 @@ def main():
     color_var = ctk.StringVar(value="White")
     color_menu = ctk.CTkOptionMenu(app, values=["White", "Black"], variable=color_var)
     color_menu.pack(pady=10)
+    ponder_var = ctk.BooleanVar(value=False)
+    ctk.CTkCheckBox(app, text="Engine thinks on my time", variable=ponder_var).pack(
+        pady=5
+    )
+    eval_var = ctk.BooleanVar(value=False)
+    ctk.CTkCheckBox(app, text="Show evaluation bar", variable=eval_var).pack(pady=5)
 
     def start_game():
         if os.path.exists("engine") and os.listdir("engine"):
@@ -105,9 +91,22 @@ def main():
                 print("Stockfish not found:", stockfish_path)
                 return
             ensure_executable(stockfish_path)
+            ponder = ponder_var.get()
+            show_eval = eval_var.get()
             app.destroy()
+            engine = None
+            if engine_manager:
+                engine = engine_manager.acquire(stockfish_path, level, ponder)
             game = ChessGame(
-                800, 800, "Chess", 60, engine_path=stockfish_path, level=level
+                800,
+                800,
+                "Chess",
+                60,
+                engine_path=stockfish_path,
+                level=level,
+                engine=engine,
+                ponder=ponder,
+                show_eval=show_eval,
             )
             game.run()
         else:
@@ -116,7 +115,10 @@ def main():
                 "Wait",
                 "Please wait while the chess engine is being set up.This only happens on the first run.",
             )
-            ensure_engine()
+            stockfish_path = ensure_engine()
+            if engine_manager:
+                ensure_executable(stockfish_path)
+                engine_manager.start(stockfish_path)
     ctk.CTkButton(
         app,
         text="Start Game",
@@ -1,53 +1,462 @@
 import chess
 import chess.engine
+import math
+import os
+import platform
 import random
+import threading
+import time
+from backend.book import OpeningBook
+from backend.move_cache import MoveCache
+
+BOOK_SETTINGS = {
+    "500": {"moves": 4, "temperature": 3.0, "min_share": 0.0},
+    "800": {"moves": 5, "temperature": 3.0, "min_share": 0.0},
+    "1000": {"moves": 6, "temperature": 2.0, "min_share": 0.0},
+    "1200": {"moves": 7, "temperature": 2.0, "min_share": 0.0},
+    "1500": {"moves": 8, "temperature": 1.5, "min_share": 0.05},
+    "1800": {"moves": 10, "temperature": 1.2, "min_share": 0.1},
+    "2000": {"moves": 12, "temperature": 1.0, "min_share": 0.1},
+    "2200": {"moves": 14, "temperature": 1.0, "min_share": 0.15},
+    "2500": {"moves": 16, "temperature": 0.8, "min_share": 0.2},
+    "2800": {"moves": 20, "temperature": 0.5, "min_share": 0.25},
+    "3000": {"moves": 20, "temperature": 0.5, "min_share": 0.25},
+    "Maximum": {"moves": 20, "temperature": 0.5, "min_share": 0.25},
+}
+
+def engine_dir():
+    return os.path.join(os.getcwd(), "engine")
+
+def get_stockfish_path():
+    base = engine_dir()
+    system = platform.system()
+    machine = platform.machine().lower()
+    if system == "Windows":
+        return os.path.join(
+            base, "engine_windows", "stockfish-windows-x86-64-avx2.exe"
+        )
+    elif system == "Linux":
+        return os.path.join(base, "engine_linux", "stockfish-ubuntu-x86-64-avx2")
+    elif system == "Darwin":
+        if "arm" in machine or "aarch64" in machine:
+            return os.path.join(base, "engine_mac_m", "stockfish-macos-m1")
+        else:
+            return os.path.join(base, "engine_mac_intel", "stockfish-macos-intel")
+    else:
+        raise Exception("Unsupported Operating System")
+
+def open_engine(executable_path):
+    engine = chess.engine.SimpleEngine.popen_uci(executable_path)
+    engine.configure({"Threads": 1, "Hash": 64})
+    engine.ping()
+    return engine
+
+class EngineManager:
+    def __init__(self):
+        self.engine = None
+        self.move_cache = None
+        self.lock = threading.Lock()
+
+    def start(self, executable_path):
+        threading.Thread(
+            target=self._ensure_engine, args=(executable_path,), daemon=True
+        ).start()
+
+    def _ensure_engine(self, executable_path):
+        with self.lock:
+            if self.engine is not None:
+                try:
+                    self.engine.ping()
+                except Exception:
+                    self.engine = None
+            if self.engine is None:
+                try:
+                    self.engine = open_engine(executable_path)
+                except Exception:
+                    self.engine = None
+            return self.engine
+
+    def acquire(self, executable_path, level="1500", ponder=False):
+        engine = self._ensure_engine(executable_path)
+        if self.move_cache is None:
+            self.move_cache = MoveCache()
+        if engine is None:
+            return ChessEngine(
+                executable_path, level, ponder=ponder, move_cache=self.move_cache
+            )
+        chess_engine = ChessEngine(
+            executable_path,
+            level,
+            engine=engine,
+            ponder=ponder,
+            move_cache=self.move_cache,
+        )
+        chess_engine.new_game()
+        return chess_engine
+
+    def shutdown(self):
+        with self.lock:
+            if self.engine is not None:
+                try:
+                    self.engine.quit()
+                except Exception:
+                    pass
+                self.engine = None
+
+class PonderSearch:
+    def __init__(self, engine, board, limit, game):
+        self.position = board.epd()
+        self.result = None
+        self.search = None
+        self.cancelled = False
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(
+            target=self.run, args=(engine, board, limit, game), daemon=True
+        )
+        self.thread.start()
+
+    def run(self, engine, board, limit, game):
+        try:
+            with self.lock:
+                if self.cancelled:
+                    return
+                self.search = engine.analysis(board, limit, game=game)
+            self.result = self.search.wait()
+        except Exception:
+            self.result = None
+
+    def wait(self):
+        self.thread.join()
+        return self.result
+
+    def done(self):
+        return not self.thread.is_alive()
+
+    def stop(self):
+        with self.lock:
+            self.cancelled = True
+            if self.search:
+                self.search.stop()
+
+    def cancel(self):
+        self.stop()
+        self.thread.join()
+
+class AnalysisStream:
+    def __init__(self, engine, board, game, callback, interval=0.25):
+        self.board = board
+        self.callback = callback
+        self.interval = interval
+        self.search = None
+        self.cancelled = False
+        self.pending = None
+        self.timer = None
+        self.last_update = 0.0
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(
+            target=self.run, args=(engine, game), daemon=True
+        )
+        self.thread.start()
+
+    def run(self, engine, game):
+        try:
+            with self.lock:
+                if self.cancelled:
+                    return
+                self.search = engine.analysis(self.board, game=game)
+            for info in self.search:
+                if "score" in info and info.get("pv"):
+                    self.publish(info["score"].white(), info["pv"][:6])
+        except Exception:
+            pass
+
+    def publish(self, score, pv):
+        with self.lock:
+            if self.cancelled:
+                return
+            self.pending = (score, pv)
+            if self.timer:
+                return
+            delay = self.last_update + self.interval - time.monotonic()
+            if delay > 0:
+                self.timer = threading.Timer(delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        with self.lock:
+            self.timer = None
+            pending = self.pending
+            self.pending = None
+            if self.cancelled or pending is None:
+                return
+            self.last_update = time.monotonic()
+        score, pv = pending
+        self.callback(score, self.board.variation_san(pv))
+
+    def cancel(self, wait=True):
+        with self.lock:
+            self.cancelled = True
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+            if self.search:
+                self.search.stop()
+        if wait:
+            self.thread.join()
 
 class ChessEngine:
-    def __init__(self, executable_path, level="1500"):
-        self.engine = chess.engine.SimpleEngine.popen_uci(executable_path)
+    def __init__(
+        self,
+        executable_path,
+        level="1500",
+        engine=None,
+        ponder=False,
+        move_cache=None,
+        seed=None,
+    ):
+        self.owns_engine = engine is None
+        self.engine = engine or open_engine(executable_path)
+        self.move_cache = move_cache or MoveCache()
+        self.search = None
+        self.stopped = False
+        self.ponder = ponder
+        self.pondering = None
+        self.analysis = None
+        self.lock = threading.Lock()
+        self.game = object()
+        self.board = chess.Board()
+        self.rng = random.Random(seed)
+        self.last_nodes = 0
+        self.book = OpeningBook()
+        self.book_moves_played = 0
+        self.in_book = True
         self.set_level(level)
 
     def set_level(self, level):
         elo_map = {
-            "500": {"skill": 0, "depth": 1, "time": 0.05, "random": 0.70},
-            "800": {"skill": 0, "depth": 1, "time": 0.05, "random": 0.50},
-            "1000": {"skill": 1, "depth": 2, "time": 0.1, "random": 0.40},
-            "1200": {"skill": 3, "depth": 3, "time": 0.2, "random": 0.30},
-            "1500": {"skill": 8, "depth": 5, "time": 0.5, "random": 0.20},
-            "1800": {"skill": 11, "depth": 7, "time": 1.0, "random": 0.10},
-            "2000": {"skill": 14, "depth": 10, "time": 1.5, "random": 0.0},
-            "2200": {"skill": 17, "depth": 12, "time": 2.0, "random": 0.0},
-            "2500": {"skill": 20, "depth": 15, "time": 2.5, "random": 0.0},
-            "2800": {"skill": 20, "depth": 18, "time": 5.0, "random": 0.0},
-            "3000": {"skill": 20, "depth": 22, "time": 7.0, "random": 0.0},
-            "Maximum": {"skill": 20, "depth": None, "time": 8.0, "random": 0.0},
+            "500": {"skill": 20, "nodes": 100, "multipv": 10, "temperature": 300},
+            "800": {"skill": 20, "nodes": 250, "multipv": 8, "temperature": 200},
+            "1000": {"skill": 20, "nodes": 500, "multipv": 6, "temperature": 120},
+            "1200": {"skill": 20, "nodes": 1000, "multipv": 5, "temperature": 70},
+            "1500": {"skill": 20, "nodes": 2500, "multipv": 4, "temperature": 35},
+            "1800": {"skill": 20, "nodes": 5000, "multipv": 3, "temperature": 20},
+            "2000": {"skill": 14, "depth": 10, "time": 1.5},
+            "2200": {"skill": 17, "depth": 12, "time": 2.0},
+            "2500": {"skill": 20, "depth": 15, "time": 2.5},
+            "2800": {"skill": 20, "depth": 18, "time": 5.0},
+            "3000": {"skill": 20, "depth": 22, "time": 7.0},
+            "Maximum": {"skill": 20, "depth": None, "time": 8.0},
         }
         config = elo_map.get(str(level), elo_map["1500"])
         self.engine.configure(
             {"Skill Level": config["skill"], "Threads": 1, "Hash": 64}
         )
-        self.time_limit = config["time"]
-        self.depth = config["depth"]
-        self.random_chance = config["random"]
+        self.time_limit = config.get("time")
+        self.depth = config.get("depth")
+        self.nodes = config.get("nodes")
+        self.multipv = config.get("multipv", 1)
+        self.temperature = config.get("temperature")
+        self.use_cache = config["skill"] >= 20
+        self.config_key = (
+            f"{config['skill']}/{self.depth}/{self.time_limit}"
+            f"/{self.nodes}/{self.multipv}"
+        )
+        self.book_settings = BOOK_SETTINGS.get(str(level), BOOK_SETTINGS["1500"])
+
+    def search_limit(self):
+        if self.nodes:
+            return chess.engine.Limit(nodes=self.nodes)
+        if self.depth:
+            return chess.engine.Limit(time=self.time_limit, depth=self.depth)
+        return chess.engine.Limit(time=self.time_limit)
+
+    def book_move(self, board):
+        if not self.in_book or self.book_moves_played >= self.book_settings["moves"]:
+            return None
+        move = self.book.choose(
+            board,
+            self.book_settings["temperature"],
+            self.book_settings["min_share"],
+            self.rng,
+        )
+        if move is None:
+            self.in_book = False
+            return None
+        self.book_moves_played += 1
+        return move
+
+    def run_search(self, board, limit, game, **options):
+        with self.lock:
+            if game is not self.game:
+                return None, None
+            search = self.engine.analysis(board, limit, game=game, **options)
+            self.search = search
+        try:
+            best = search.wait()
+        finally:
+            with self.lock:
+                if self.search is search:
+                    self.search = None
+        return search, best
 
-    def get_best_move(self, fen):
-        board = chess.Board(fen)
-        if self.random_chance > 0 and random.random() < self.random_chance:
-            move = random.choice(list(board.legal_moves))
+    def sample_move(self, board, game):
+        search, _ = self.run_search(
+            board,
+            chess.engine.Limit(nodes=self.nodes),
+            game,
+            multipv=self.multipv,
+        )
+        if search is None or game is not self.game:
+            return None
+        self.last_nodes = search.info.get("nodes", 0)
+        candidates = [
+            (info["pv"][0], info["score"].pov(board.turn).score(mate_score=100000))
+            for info in search.multipv
+            if info.get("pv") and "score" in info
+        ]
+        if not candidates:
+            return None
+        best = max(score for _, score in candidates)
+        weights = [
+            math.exp((score - best) / self.temperature) for _, score in candidates
+        ]
+        return self.rng.choices([move for move, _ in candidates], weights)[0]
+
+    def cached_move(self, board):
+        if not self.use_cache:
+            return None
+        moves = self.move_cache.get(board.epd(), self.config_key)
+        if moves is None:
+            return None
+        moves = [chess.Move.from_uci(uci) for uci in moves.split()]
+        if moves[0] not in board.legal_moves:
+            return None
+        return chess.engine.BestMove(moves[0], moves[1] if len(moves) > 1 else None)
+
+    def cache_move(self, board, best):
+        if not self.use_cache:
+            return
+        moves = best.move.uci()
+        if best.ponder:
+            moves += " " + best.ponder.uci()
+        self.move_cache.put(board.epd(), self.config_key, moves)
+
+    def push_move(self, start, end):
+        from_square = (7 - start[0]) * 8 + start[1]
+        to_square = (7 - end[0]) * 8 + end[1]
+        promotion = None
+        if self.board.piece_type_at(from_square) == chess.PAWN and end[0] in (0, 7):
+            promotion = chess.QUEEN
+        self.board.push(chess.Move(from_square, to_square, promotion))
+
+    def get_best_move(self, fen=None):
+        game = self.game
+        board = chess.Board(fen) if fen else self.board.copy()
+        with self.lock:
+            self.stopped = False
+            pondering = self.pondering
+            self.pondering = None
+            self.stop_analysis()
+        self.last_nodes = 0
+        move = self.book_move(board)
+        if move is None and self.nodes:
+            move = self.sample_move(board, game)
+        if move is not None:
+            if pondering:
+                pondering.cancel()
+            if game is not self.game:
+                return None, None
+        elif self.stopped:
+            if pondering:
+                pondering.cancel()
+            return None, None
         else:
-            if self.depth:
-                limit = chess.engine.Limit(time=self.time_limit, depth=self.depth)
-            else:
-                limit = chess.engine.Limit(time=self.time_limit)
-            result = self.engine.play(board, limit)
-            move = result.move
+            best = self.cached_move(board)
+            if pondering and best is None and pondering.position == board.epd():
+                with self.lock:
+                    self.search = pondering
+                best = pondering.wait()
+                with self.lock:
+                    if self.search is pondering:
+                        self.search = None
+            elif pondering:
+                pondering.cancel()
+            if best is None or best.move is None:
+                if self.stopped:
+                    return None, None
+                search, best = self.run_search(board, self.search_limit(), game)
+                if search is None or game is not self.game:
+                    return None, None
+                self.last_nodes = search.info.get("nodes", 0)
+                if best.move is not None and not self.stopped:
+                    self.cache_move(board, best)
+            move = best.move
+            if move is None or game is not self.game:
+                return None, None
+            if self.ponder and best.ponder:
+                board.push(move)
+                board.push(best.ponder)
+                with self.lock:
+                    if game is self.game and not self.stopped:
+                        self.pondering = PonderSearch(
+                            self.engine, board, self.search_limit(), game
+                        )
         start_row = 7 - (move.from_square // 8)
         start_col = move.from_square % 8
         end_row = 7 - (move.to_square // 8)
         end_col = move.to_square % 8
         return (start_row, start_col), (end_row, end_col)
     
+    def start_analysis(self, callback, interval=0.25):
+        with self.lock:
+            if (self.pondering and not self.pondering.done()) or self.search:
+                return False
+            self.stop_analysis()
+            self.analysis = AnalysisStream(
+                self.engine, self.board.copy(), self.game, callback, interval
+            )
+            return True
+
+    def stop_analysis(self, wait=True):
+        analysis = self.analysis
+        self.analysis = None
+        if analysis:
+            analysis.cancel(wait)
+
+    def new_game(self):
+        with self.lock:
+            self.game = object()
+        self.stop()
+        self.stop_pondering()
+        self.stop_analysis()
+        self.board = chess.Board()
+        self.book_moves_played = 0
+        self.in_book = True
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            search = self.search
+        if search:
+            search.stop()
+
+    def stop_pondering(self):
+        with self.lock:
+            pondering = self.pondering
+            self.pondering = None
+        if pondering:
+            pondering.cancel()
+
     def quit(self):
+        self.stop()
+        self.stop_pondering()
+        self.stop_analysis()
+        self.book.close()
+        if not self.owns_engine:
+            return
         try:
             self.engine.quit()
         except:
@@ -0,0 +1,143 @@
+import sqlite3
+import datetime
+import io
+import chess
+import chess.pgn
+import chess.polyglot
+
+DB_NAME = "chess_games.db"
+
+
+def init_archive(db_path=DB_NAME):
+    with sqlite3.connect(db_path, timeout=5) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS games (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                played_at TEXT NOT NULL,
+                level TEXT,
+                player_color TEXT,
+                result TEXT NOT NULL,
+                termination TEXT,
+                plies INTEGER NOT NULL,
+                pgn TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS game_positions (
+                position_hash INTEGER NOT NULL,
+                game_id INTEGER NOT NULL,
+                ply INTEGER NOT NULL,
+                PRIMARY KEY (position_hash, game_id, ply)
+            ) WITHOUT ROWID
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_games_level_result ON games (level, result)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_games_result ON games (result)")
+
+
+def position_hash(board):
+    key = chess.polyglot.zobrist_hash(board)
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def save_game(board, level, player_color, result, termination, db_path=DB_NAME):
+    init_archive(db_path)
+    played_at = datetime.datetime.now().isoformat(timespec="seconds")
+    engine_name = f"Stockfish {level}"
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = "A Day Companion"
+    game.headers["Date"] = played_at[:10].replace("-", ".")
+    game.headers["White"] = "You" if player_color == "white" else engine_name
+    game.headers["Black"] = "You" if player_color == "black" else engine_name
+    game.headers["Result"] = result
+    game.headers["Termination"] = termination
+    replay = board.root()
+    hashes = []
+    for ply, move in enumerate(board.move_stack, 1):
+        replay.push(move)
+        hashes.append((position_hash(replay), ply))
+    with sqlite3.connect(db_path, timeout=5) as conn:
+        cursor = conn.execute(
+            """
+            INSERT INTO games
+            (played_at, level, player_color, result, termination, plies, pgn)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                played_at,
+                str(level),
+                player_color,
+                result,
+                termination,
+                len(board.move_stack),
+                str(game),
+            ),
+        )
+        game_id = cursor.lastrowid
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO game_positions (position_hash, game_id, ply)
+            VALUES (?, ?, ?)
+            """,
+            [(key, game_id, ply) for key, ply in hashes],
+        )
+    return game_id
+
+
+def games_with_position(board, limit=20, db_path=DB_NAME):
+    init_archive(db_path)
+    with sqlite3.connect(db_path, timeout=5) as conn:
+        return conn.execute(
+            """
+            SELECT g.id, p.ply, g.played_at, g.level, g.player_color, g.result
+            FROM game_positions p JOIN games g ON g.id = p.game_id
+            WHERE p.position_hash = ?
+            ORDER BY p.game_id DESC
+            LIMIT ?
+            """,
+            (position_hash(board), limit),
+        ).fetchall()
+
+
+def find_games(level=None, result=None, limit=50, offset=0, db_path=DB_NAME):
+    init_archive(db_path)
+    query = """
+        SELECT id, played_at, level, player_color, result, termination, plies
+        FROM games
+    """
+    conditions = []
+    params = []
+    if level is not None:
+        conditions.append("level = ?")
+        params.append(str(level))
+    if result is not None:
+        conditions.append("result = ?")
+        params.append(result)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY id DESC LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+    with sqlite3.connect(db_path, timeout=5) as conn:
+        return conn.execute(query, params).fetchall()
+
+
+def load_game(game_id, db_path=DB_NAME):
+    init_archive(db_path)
+    with sqlite3.connect(db_path, timeout=5) as conn:
+        row = conn.execute("SELECT pgn FROM games WHERE id = ?", (game_id,)).fetchone()
+    if row is None:
+        return None
+    return chess.pgn.read_game(io.StringIO(row[0]))
+
+
+def replay_boards(game_id, db_path=DB_NAME):
+    game = load_game(game_id, db_path)
+    if game is None:
+        return
+    board = game.board()
+    yield board.copy()
+    for move in game.mainline_moves():
+        board.push(move)
+        yield board.copy()
@@ -1,15 +1,76 @@
 import copy
+import random
+
+CASTLING_SQUARES = {
+    (7, 4): ("wK", "wQ"),
+    (7, 0): ("wQ",),
+    (7, 7): ("wK",),
+    (0, 4): ("bK", "bQ"),
+    (0, 0): ("bQ",),
+    (0, 7): ("bK",),
+}
+
+KNIGHT_OFFSETS = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]
+KING_OFFSETS = [(1, 1), (1, -1), (-1, 1), (-1, -1), (1, 0), (-1, 0), (0, 1), (0, -1)]
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+_zobrist_rng = random.Random(0x5EED)
+ZOBRIST_PIECES = {
+    color + kind: [_zobrist_rng.getrandbits(64) for _ in range(64)]
+    for color in "wb"
+    for kind in "PNBRQK"
+}
+ZOBRIST_CASTLING = {
+    right: _zobrist_rng.getrandbits(64) for right in ("wK", "wQ", "bK", "bQ")
+}
+ZOBRIST_EN_PASSANT = [_zobrist_rng.getrandbits(64) for _ in range(8)]
+ZOBRIST_BLACK_TO_MOVE = _zobrist_rng.getrandbits(64)
 
 class GameState:
-    def __init__(self):
+    def __init__(self, fen=None, player_color=None):
         self.turn = "white"
-        from backend.chess_runner import color
-        self.player_color = color
+        if player_color is None:
+            from backend.chess_runner import color
+            player_color = color
+        self.player_color = player_color
         self.board = self.create_board()
         self.move_history = []
+        self.undo_stack = []
+        self.king_squares = {"w": (7, 4), "b": (0, 4)}
         self.en_passant = None
         self.castling_rights = {"wK": True, "wQ": True, "bK": True, "bQ": True}
-        self.position_history = [self.get_board_string()]
+        if fen:
+            self.load_fen(fen)
+        self.zobrist_key = self.compute_zobrist_key()
+        self.position_counts = {self.zobrist_key: 1}
+        self._legal_moves = None
+        self._legal_moves_key = None
+
+    def load_fen(self, fen):
+        fields = fen.split()
+        self.board = []
+        for r, row in enumerate(fields[0].split("/")):
+            squares = []
+            for char in row:
+                if char.isdigit():
+                    squares.extend(["--"] * int(char))
+                else:
+                    color = "w" if char.isupper() else "b"
+                    squares.append(color + char.upper())
+                    if char.upper() == "K":
+                        self.king_squares[color] = (r, len(squares) - 1)
+            self.board.append(squares)
+        self.turn = "white" if fields[1] == "w" else "black"
+        self.castling_rights = {
+            "wK": "K" in fields[2],
+            "wQ": "Q" in fields[2],
+            "bK": "k" in fields[2],
+            "bQ": "q" in fields[2],
+        }
+        self.en_passant = None
+        if fields[3] != "-":
+            self.en_passant = (8 - int(fields[3][1]), "abcdefgh".index(fields[3][0]))
 
     def create_board(self):
         return [
@@ -27,82 +88,166 @@ class GameState:
         if not is_simulation:
             if end not in self.get_legal_moves(start):
                 return False
+        self.make_move(start, end, promo)
+        self._legal_moves = None
+        if not is_simulation:
+            key = self.zobrist_key
+            self.position_counts[key] = self.position_counts.get(key, 0) + 1
+        return True
+
+    def make_move(self, start, end, promo="Q"):
         sr, sc = start
         er, ec = end
         piece = self.board[sr][sc]
-        if piece[1] == "P" and self.en_passant == (er, ec):
+        captured = self.board[er][ec]
+        capture_square = end
+        if piece[1] == "P" and self.en_passant == end:
+            capture_square = (sr, ec)
+            captured = self.board[sr][ec]
             self.board[sr][ec] = "--"
+        self.undo_stack.append(
+            (
+                start,
+                end,
+                piece,
+                captured,
+                capture_square,
+                self.en_passant,
+                self.castling_rights,
+                self.zobrist_key,
+            )
+        )
+        key = self.zobrist_key ^ ZOBRIST_BLACK_TO_MOVE
+        key ^= ZOBRIST_PIECES[piece][sr * 8 + sc]
+        if captured != "--":
+            key ^= ZOBRIST_PIECES[captured][capture_square[0] * 8 + capture_square[1]]
         self.board[er][ec] = piece
         self.board[sr][sc] = "--"
+        if self.en_passant:
+            key ^= ZOBRIST_EN_PASSANT[self.en_passant[1]]
         if piece[1] == "P" and abs(sr - er) == 2:
             self.en_passant = ((sr + er) // 2, sc)
+            key ^= ZOBRIST_EN_PASSANT[sc]
         else:
             self.en_passant = None
-        if piece == "wK":
-            self.castling_rights["wK"] = False
-            self.castling_rights["wQ"] = False
-        if piece == "bK":
-            self.castling_rights["bK"] = False
-            self.castling_rights["bQ"] = False
-        if piece == "wR":
-            if sc == 0:
-                self.castling_rights["wQ"] = False
-            if sc == 7:
-                self.castling_rights["wK"] = False
-        if piece == "bR":
-            if sc == 0:
-                self.castling_rights["bQ"] = False
-            if sc == 7:
-                self.castling_rights["bK"] = False
+        lost_rights = CASTLING_SQUARES.get(start, ()) + CASTLING_SQUARES.get(end, ())
+        if any(self.castling_rights[right] for right in lost_rights):
+            self.castling_rights = dict(self.castling_rights)
+            for right in lost_rights:
+                if self.castling_rights[right]:
+                    key ^= ZOBRIST_CASTLING[right]
+                    self.castling_rights[right] = False
+        if piece[1] == "K":
+            self.king_squares[piece[0]] = end
         if piece[1] == "K" and abs(sc - ec) == 2:
+            rook = piece[0] + "R"
             if ec == 6:
                 self.board[er][5] = self.board[er][7]
                 self.board[er][7] = "--"
+                key ^= ZOBRIST_PIECES[rook][er * 8 + 7] ^ ZOBRIST_PIECES[rook][er * 8 + 5]
             if ec == 2:
                 self.board[er][3] = self.board[er][0]
                 self.board[er][0] = "--"
+                key ^= ZOBRIST_PIECES[rook][er * 8] ^ ZOBRIST_PIECES[rook][er * 8 + 3]
         if piece[1] == "P" and er in (0, 7):
             self.board[er][ec] = piece[0] + promo
+        self.zobrist_key = key ^ ZOBRIST_PIECES[self.board[er][ec]][er * 8 + ec]
         self.turn = "black" if self.turn == "white" else "white"
         self.move_history.append((start, end))
-        if not is_simulation:
-            self.position_history.append(self.get_board_string())
-        return True
-    
+
+    def unmake_move(self):
+        (
+            start,
+            end,
+            piece,
+            captured,
+            capture_square,
+            en_passant,
+            castling_rights,
+            zobrist_key,
+        ) = self.undo_stack.pop()
+        sr, sc = start
+        er, ec = end
+        self.board[sr][sc] = piece
+        self.board[er][ec] = "--"
+        self.board[capture_square[0]][capture_square[1]] = captured
+        if piece[1] == "K":
+            self.king_squares[piece[0]] = start
+        if piece[1] == "K" and abs(sc - ec) == 2:
+            if ec == 6:
+                self.board[er][7] = self.board[er][5]
+                self.board[er][5] = "--"
+            if ec == 2:
+                self.board[er][0] = self.board[er][3]
+                self.board[er][3] = "--"
+        self.en_passant = en_passant
+        self.castling_rights = castling_rights
+        self.zobrist_key = zobrist_key
+        self.turn = "black" if self.turn == "white" else "white"
+        self.move_history.pop()
+
     def get_legal_moves(self, pos):
-        moves = self.get_pseudo_moves(pos)
+        return self.legal_moves().get(tuple(pos), [])
+
+    def legal_moves(self):
+        if self._legal_moves is None or self._legal_moves_key != self.zobrist_key:
+            moves = {}
+            for r in range(8):
+                for c in range(8):
+                    if self.board[r][c] != "--" and self.board[r][c][0] == self.turn[0]:
+                        targets = self.filter_legal((r, c), self.get_pseudo_moves((r, c)))
+                        if targets:
+                            moves[(r, c)] = targets
+            self._legal_moves = moves
+            self._legal_moves_key = self.zobrist_key
+        return self._legal_moves
+
+    def filter_legal(self, pos, moves):
+        color = self.turn
         legal = []
         for m in moves:
-            copy_board = self.copy_state()
-            copy_board.move_piece(pos, m, is_simulation=True)
-            if not copy_board.king_in_check(self.turn):
+            self.make_move(pos, m)
+            if not self.king_in_check(color):
                 legal.append(m)
+            self.unmake_move()
         return legal
+
+    def has_legal_moves(self):
+        return bool(self.legal_moves())
     
     def king_in_check(self, color):
-        king = color[0] + "K"
-        for r in range(8):
-            for c in range(8):
-                if self.board[r][c] == king:
-                    return self.square_under_attack(r, c, color)
-        return False
+        r, c = self.king_squares[color[0]]
+        return self.square_under_attack(r, c, color)
     
     def square_under_attack(self, r, c, color):
-        opponent = "black" if color == "white" else "white"
-        original_turn = self.turn
-        self.turn = opponent
-        under_attack = False
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece != "--" and piece[0] == opponent[0]:
-                    if (r, c) in self.get_pseudo_moves((row, col)):
-                        under_attack = True
+        enemy = "b" if color == "white" else "w"
+        pawn_row = r - 1 if enemy == "b" else r + 1
+        if 0 <= pawn_row < 8:
+            for pc in (c - 1, c + 1):
+                if 0 <= pc < 8 and self.board[pawn_row][pc] == enemy + "P":
+                    return True
+        for offsets, attacker in (
+            (KNIGHT_OFFSETS, enemy + "N"),
+            (KING_OFFSETS, enemy + "K"),
+        ):
+            for dr, dc in offsets:
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < 8 and 0 <= nc < 8 and self.board[nr][nc] == attacker:
+                    return True
+        for directions, sliders in (
+            (ROOK_DIRECTIONS, (enemy + "R", enemy + "Q")),
+            (BISHOP_DIRECTIONS, (enemy + "B", enemy + "Q")),
+        ):
+            for dr, dc in directions:
+                nr, nc = r + dr, c + dc
+                while 0 <= nr < 8 and 0 <= nc < 8:
+                    piece = self.board[nr][nc]
+                    if piece != "--":
+                        if piece in sliders:
+                            return True
                         break
-            if under_attack:
-                break
-        self.turn = original_turn
-        return under_attack
+                    nr, nc = nr + dr, nc + dc
+        return False
     
     def get_pseudo_moves(self, pos):
         r, c = pos
@@ -141,23 +286,14 @@ class GameState:
         return moves
     
     def rook_moves(self, r, c):
-        return self.slide_moves(r, c, [(-1, 0), (1, 0), (0, -1), (0, 1)])
+        return self.slide_moves(r, c, ROOK_DIRECTIONS)
     
     def bishop_moves(self, r, c):
-        return self.slide_moves(r, c, [(1, 1), (1, -1), (-1, 1), (-1, -1)])
+        return self.slide_moves(r, c, BISHOP_DIRECTIONS)
     
     def knight_moves(self, r, c):
         moves = []
-        for d in [
-            (2, 1),
-            (2, -1),
-            (-2, 1),
-            (-2, -1),
-            (1, 2),
-            (1, -2),
-            (-1, 2),
-            (-1, -2),
-        ]:
+        for d in KNIGHT_OFFSETS:
             nr, nc = r + d[0], c + d[1]
             if 0 <= nr < 8 and 0 <= nc < 8:
                 if self.board[nr][nc] == "--" or self.board[nr][nc][0] != self.turn[0]:
@@ -166,7 +302,7 @@ class GameState:
     
     def king_moves(self, r, c):
         moves = []
-        for d in [(1, 1), (1, -1), (-1, 1), (-1, -1), (1, 0), (-1, 0), (0, 1), (0, -1)]:
+        for d in KING_OFFSETS:
             nr, nc = r + d[0], c + d[1]
             if 0 <= nr < 8 and 0 <= nc < 8:
                 if self.board[nr][nc] == "--" or self.board[nr][nc][0] != self.turn[0]:
@@ -176,6 +312,8 @@ class GameState:
                 self.castling_rights["wK"]
                 and self.board[7][5] == "--"
                 and self.board[7][6] == "--"
+                and not self.square_under_attack(7, 4, "white")
+                and not self.square_under_attack(7, 5, "white")
             ):
                 moves.append((7, 6))
             if (
@@ -183,6 +321,8 @@ class GameState:
                 and self.board[7][1] == "--"
                 and self.board[7][2] == "--"
                 and self.board[7][3] == "--"
+                and not self.square_under_attack(7, 4, "white")
+                and not self.square_under_attack(7, 3, "white")
             ):
                 moves.append((7, 2))
         if self.turn == "black" and r == 0:
@@ -190,6 +330,8 @@ class GameState:
                 self.castling_rights["bK"]
                 and self.board[0][5] == "--"
                 and self.board[0][6] == "--"
+                and not self.square_under_attack(0, 4, "black")
+                and not self.square_under_attack(0, 5, "black")
             ):
                 moves.append((0, 6))
             if (
@@ -197,6 +339,8 @@ class GameState:
                 and self.board[0][1] == "--"
                 and self.board[0][2] == "--"
                 and self.board[0][3] == "--"
+                and not self.square_under_attack(0, 4, "black")
+                and not self.square_under_attack(0, 3, "black")
             ):
                 moves.append((0, 2))
         return moves
@@ -221,28 +365,34 @@ class GameState:
     def checkmate(self):
         if not self.king_in_check(self.turn):
             return False
-        for r in range(8):
-            for c in range(8):
-                if self.board[r][c] != "--" and self.board[r][c][0] == self.turn[0]:
-                    if self.get_legal_moves((r, c)):
-                        return False
-        return True
+        return not self.has_legal_moves()
     
     def stalemate(self):
         if self.king_in_check(self.turn):
             return False
-        for r in range(8):
-            for c in range(8):
-                if self.board[r][c] != "--" and self.board[r][c][0] == self.turn[0]:
-                    if self.get_legal_moves((r, c)):
-                        return False
-        return True
+        return not self.has_legal_moves()
     
     def get_board_string(self):
         return " ".join(self.get_fen().split(" ")[:4])
     
     def threefold_repetition(self):
-        return self.position_history.count(self.get_board_string()) >= 3
+        return self.position_counts.get(self.zobrist_key, 0) >= 3
+
+    def compute_zobrist_key(self):
+        key = 0
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece != "--":
+                    key ^= ZOBRIST_PIECES[piece][r * 8 + c]
+        for right, allowed in self.castling_rights.items():
+            if allowed:
+                key ^= ZOBRIST_CASTLING[right]
+        if self.en_passant:
+            key ^= ZOBRIST_EN_PASSANT[self.en_passant[1]]
+        if self.turn == "black":
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        return key
     
     def copy_state(self):
         return copy.deepcopy(self)
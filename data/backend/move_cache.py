@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DB_NAME = "engine_cache.db"
+MAX_ENTRIES = 5000
+
+
+class MoveCache:
+    def __init__(self, db_path=DB_NAME, max_entries=MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if self.db_path is None:
+            return
+        try:
+            with sqlite3.connect(self.db_path, timeout=5) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS move_cache (
+                        position TEXT,
+                        config TEXT,
+                        moves TEXT,
+                        last_used REAL,
+                        PRIMARY KEY (position, config)
+                    )
+                """)
+                conn.execute(
+                    """
+                    DELETE FROM move_cache WHERE rowid NOT IN (
+                        SELECT rowid FROM move_cache ORDER BY last_used DESC LIMIT ?
+                    )
+                    """,
+                    (self.max_entries,),
+                )
+                rows = conn.execute(
+                    "SELECT position, config, moves FROM move_cache ORDER BY last_used"
+                ).fetchall()
+        except sqlite3.Error:
+            rows = []
+        for position, config, moves in rows:
+            self.entries[(position, config)] = moves
+
+    def get(self, position, config):
+        key = (position, config)
+        with self.lock:
+            moves = self.entries.get(key)
+            if moves is None:
+                return None
+            self.entries.move_to_end(key)
+        self.store(key, moves)
+        return moves
+
+    def put(self, position, config, moves):
+        key = (position, config)
+        with self.lock:
+            self.entries[key] = moves
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        self.store(key, moves)
+
+    def store(self, key, moves):
+        if self.db_path is None:
+            return
+        try:
+            with sqlite3.connect(self.db_path, timeout=5) as conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO move_cache
+                    (position, config, moves, last_used)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (key[0], key[1], moves, time.time()),
+                )
+        except sqlite3.Error:
+            pass
@@ -0,0 +1,122 @@
+import argparse
+import sys
+import time
+import chess
+from backend.bitboard import BitboardState
+from backend.logic import GameState
+
+POSITIONS = [
+    ("start", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", 4),
+    (
+        "kiwipete",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        3,
+    ),
+    ("en passant pins", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", 4),
+    ("illegal en passant", "3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1", 4),
+    ("en passant check", "8/8/4k3/8/2p5/8/B2P2K1/8 w - - 0 1", 4),
+    ("castling rights", "r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1", 3),
+    ("castling prevented", "r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1", 3),
+    ("short castling check", "5k2/8/8/8/8/8/8/4K2R w K - 0 1", 4),
+    ("long castling check", "3k4/8/8/8/8/8/8/R3K3 w Q - 0 1", 4),
+    (
+        "promotions",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        3,
+    ),
+]
+
+STATES = {"gamestate": GameState, "bitboard": BitboardState}
+
+
+def game_state_moves(state):
+    moves = []
+    for r in range(8):
+        for c in range(8):
+            piece = state.board[r][c]
+            if piece == "--" or piece[0] != state.turn[0]:
+                continue
+            for end in state.get_legal_moves((r, c)):
+                if piece[1] == "P" and end[0] in (0, 7):
+                    moves.extend(((r, c), end, promo) for promo in "QRBN")
+                else:
+                    moves.append(((r, c), end, "Q"))
+    return moves
+
+
+def perft(state, depth):
+    if depth == 0:
+        return 1
+    if isinstance(state, BitboardState):
+        moves = [
+            (frm, to, promo or "Q") for frm, to, promo in state.generate_legal_moves()
+        ]
+    else:
+        moves = game_state_moves(state)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for start, end, promo in moves:
+        state.make_move(start, end, promo)
+        nodes += perft(state, depth - 1)
+        state.unmake_move()
+    return nodes
+
+
+def reference_perft(board, depth):
+    if depth == 0:
+        return 1
+    if depth == 1:
+        return board.legal_moves.count()
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += reference_perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def run(state_names, depth_offset=0, verify=True, min_nps=0, out=sys.stdout):
+    ok = True
+    for name, fen, depth in POSITIONS:
+        depth = max(1, depth + depth_offset)
+        expected = reference_perft(chess.Board(fen), depth) if verify else None
+        for state_name in state_names:
+            state = STATES[state_name](fen=fen, player_color="white")
+            start = time.perf_counter()
+            nodes = perft(state, depth)
+            elapsed = max(time.perf_counter() - start, 1e-9)
+            nps = int(nodes / elapsed)
+            status = "ok"
+            if expected is not None and nodes != expected:
+                status = f"MISMATCH (python-chess {expected})"
+                ok = False
+            elif nps < min_nps:
+                status = f"SLOW (< {min_nps} nps)"
+                ok = False
+            print(
+                f"{state_name:<10} {name:<22} depth {depth}  {nodes:>9} nodes  "
+                f"{elapsed:7.2f}s  {nps:>8} nps  {status}",
+                file=out,
+            )
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Perft benchmark for the chess move generators"
+    )
+    parser.add_argument(
+        "--state", choices=["gamestate", "bitboard", "both"], default="both"
+    )
+    parser.add_argument("--depth-offset", type=int, default=0)
+    parser.add_argument("--min-nps", type=int, default=0)
+    parser.add_argument("--no-verify", action="store_true")
+    args = parser.parse_args(argv)
+    state_names = list(STATES) if args.state == "both" else [args.state]
+    ok = run(state_names, args.depth_offset, not args.no_verify, args.min_nps)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import os
+import queue
+import threading
+import chess
+import chess.engine
+from backend.engine import open_engine
+
+REVIEW_LIMIT = chess.engine.Limit(depth=16, time=0.5)
+MATE_SCORE = 10000
+MAX_SCORE = 1000
+CLASSIFICATIONS = [
+    (10, "best"),
+    (50, "good"),
+    (100, "inaccuracy"),
+    (300, "mistake"),
+]
+
+
+def classify(loss, played_best=False):
+    if played_best:
+        return "best"
+    for threshold, label in CLASSIFICATIONS:
+        if loss <= threshold:
+            return label
+    return "blunder"
+
+
+def terminal_score(board):
+    if board.is_checkmate():
+        return -MATE_SCORE if board.turn == chess.WHITE else MATE_SCORE
+    return 0
+
+
+class GameReview:
+    def __init__(self, engine_path, board, callback, workers=None, limit=REVIEW_LIMIT):
+        self.engine_path = engine_path
+        self.callback = callback
+        self.limit = limit
+        self.moves = list(board.move_stack)
+        self.positions = []
+        self.sans = []
+        position = board.root()
+        for move in self.moves:
+            self.positions.append(position.copy())
+            self.sans.append(position.san(move))
+            position.push(move)
+        self.positions.append(position)
+        self.evaluations = [None] * len(self.positions)
+        self.best_moves = [None] * len(self.positions)
+        self.results = [None] * len(self.moves)
+        self.completed = 0
+        self.cancelled = False
+        self.lock = threading.Lock()
+        self.tasks = queue.Queue()
+        for index in range(len(self.positions)):
+            self.tasks.put(index)
+        workers = min(workers or os.cpu_count() or 1, len(self.positions))
+        self.threads = [
+            threading.Thread(target=self.worker, daemon=True) for _ in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def worker(self):
+        try:
+            engine = open_engine(self.engine_path)
+        except Exception:
+            return
+        try:
+            while not self.cancelled:
+                try:
+                    index = self.tasks.get_nowait()
+                except queue.Empty:
+                    break
+                board = self.positions[index]
+                if board.is_game_over():
+                    self.record(index, terminal_score(board), None)
+                    continue
+                info = engine.analyse(board, self.limit)
+                score = info["score"].white().score(mate_score=MATE_SCORE)
+                best = info["pv"][0] if info.get("pv") else None
+                self.record(index, score, best)
+        except Exception:
+            pass
+        finally:
+            try:
+                engine.quit()
+            except Exception:
+                pass
+
+    def record(self, index, score, best):
+        ready = []
+        with self.lock:
+            self.evaluations[index] = score
+            self.best_moves[index] = best
+            self.completed += 1
+            for ply in (index - 1, index):
+                if (
+                    0 <= ply < len(self.moves)
+                    and self.results[ply] is None
+                    and self.evaluations[ply] is not None
+                    and self.evaluations[ply + 1] is not None
+                ):
+                    self.results[ply] = self.review_move(ply)
+                    ready.append(self.results[ply])
+        for result in ready:
+            self.callback(result)
+
+    def review_move(self, ply):
+        sign = 1 if self.positions[ply].turn == chess.WHITE else -1
+        before = max(-MAX_SCORE, min(MAX_SCORE, sign * self.evaluations[ply]))
+        after = max(-MAX_SCORE, min(MAX_SCORE, sign * self.evaluations[ply + 1]))
+        loss = max(0, before - after)
+        best = self.best_moves[ply]
+        return {
+            "ply": ply,
+            "san": self.sans[ply],
+            "color": "white" if sign == 1 else "black",
+            "loss": loss,
+            "label": classify(loss, self.moves[ply] == best),
+            "best": self.positions[ply].san(best) if best else None,
+        }
+
+    def done(self):
+        return self.completed == len(self.positions)
+
+    def cancel(self):
+        self.cancelled = True
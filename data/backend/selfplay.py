@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import chess
+from backend.engine import ChessEngine, get_stockfish_path
+from backend.logic import GameState
+from backend.move_cache import MoveCache
+
+MAX_PLIES = 400
+
+
+def play_game(engine_path, game_id, white_level, black_level, seed):
+    move_cache = MoveCache(db_path=None)
+    engines = {}
+    try:
+        for color, level in ((chess.WHITE, white_level), (chess.BLACK, black_level)):
+            engines[color] = ChessEngine(
+                engine_path, level, move_cache=move_cache, seed=seed * 2 + color
+            )
+        return play(engines, game_id, white_level, black_level, seed)
+    finally:
+        for engine in engines.values():
+            engine.quit()
+
+
+def play(engines, game_id, white_level, black_level, seed):
+    state = GameState(player_color="white")
+    board = chess.Board()
+    moves = []
+    result, termination = "1/2-1/2", "max_plies"
+    while len(moves) < MAX_PLIES:
+        engine = engines[board.turn]
+        start = time.perf_counter()
+        frm, to = engine.get_best_move()
+        think_ms = (time.perf_counter() - start) * 1000
+        if frm is None:
+            termination = "no_move"
+            break
+        start = time.perf_counter()
+        legal = state.move_piece(frm, to)
+        if legal:
+            if state.checkmate():
+                result = "0-1" if state.turn == "white" else "1-0"
+                termination = "checkmate"
+            elif state.stalemate():
+                termination = "stalemate"
+            elif state.threefold_repetition():
+                termination = "threefold_repetition"
+        logic_ms = (time.perf_counter() - start) * 1000
+        if not legal:
+            result, termination = "*", "illegal_move"
+            break
+        for side in engines.values():
+            side.push_move(frm, to)
+        move = engine.board.peek()
+        board.push(move)
+        moves.append(
+            {
+                "move": move.uci(),
+                "think_ms": round(think_ms, 2),
+                "logic_ms": round(logic_ms, 3),
+                "nodes": engine.last_nodes,
+            }
+        )
+        if state.get_fen().split()[0] != board.board_fen():
+            result, termination = "*", "desync"
+            break
+        if termination != "max_plies":
+            break
+    return {
+        "game": game_id,
+        "white": white_level,
+        "black": black_level,
+        "seed": seed,
+        "result": result,
+        "termination": termination,
+        "plies": len(moves),
+        "moves": moves,
+    }
+
+
+def run(
+    engine_path, level_a, level_b, games, workers=None, seed=0, out=None, log=sys.stdout
+):
+    score = {level_a: 0.0, level_b: 0.0}
+    think_ms = []
+    logic_ms = []
+    plies = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for game_id in range(games):
+            white, black = level_a, level_b
+            if game_id % 2:
+                white, black = black, white
+            futures.append(
+                pool.submit(
+                    play_game, engine_path, game_id, white, black, seed + game_id
+                )
+            )
+        for future in as_completed(futures):
+            record = future.result()
+            if out:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+            if record["result"] == "1-0":
+                score[record["white"]] += 1
+            elif record["result"] == "0-1":
+                score[record["black"]] += 1
+            elif record["result"] != "*":
+                score[record["white"]] += 0.5
+                score[record["black"]] += 0.5
+            think_ms.extend(move["think_ms"] for move in record["moves"])
+            logic_ms.extend(move["logic_ms"] for move in record["moves"])
+            plies.append(record["plies"])
+            print(
+                f"game {record['game']:>4}  {record['white']} vs {record['black']}  "
+                f"{record['result']:<7} {record['termination']:<22} "
+                f"{record['plies']:>3} plies",
+                file=log,
+            )
+    if level_a == level_b:
+        print(f"{games} games at level {level_a}", file=log)
+    else:
+        print(
+            f"{level_a} {score[level_a]:g} - {score[level_b]:g} {level_b}", file=log
+        )
+    if think_ms:
+        print(
+            f"avg think {sum(think_ms) / len(think_ms):.1f} ms/move, "
+            f"avg logic {sum(logic_ms) / len(logic_ms):.2f} ms/ply, "
+            f"avg length {sum(plies) / len(plies):.1f} plies",
+            file=log,
+        )
+    return score
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Play engine-vs-engine games between two difficulty levels"
+    )
+    parser.add_argument("level_a")
+    parser.add_argument("level_b")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engine", default=get_stockfish_path())
+    parser.add_argument("--out", default="selfplay.jsonl")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.engine):
+        print(f"Engine not found: {args.engine}", file=sys.stderr)
+        return 1
+    with open(args.out, "a") as out:
+        run(
+            args.engine,
+            args.level_a,
+            args.level_b,
+            args.games,
+            args.workers,
+            args.seed,
+            out,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
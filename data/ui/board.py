@@ -1,32 +1,91 @@
 import pygame
 import os
+import threading
+from collections import OrderedDict
+from backend.game_archive import save_game
 from backend.logic import GameState
 from backend.engine import ChessEngine
+from backend.review import GameReview
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+AI_MOVE_EVENT = pygame.USEREVENT + 1
+EVAL_EVENT = pygame.USEREVENT + 2
+EVAL_BAR_WIDTH = 30
+PV_HEIGHT = 36
+MIN_SQUARE_SIZE = 40
+SPRITE_CACHE_SIZE = 4
+REVIEW_EVENT = pygame.USEREVENT + 3
+ANALYSIS_RETRY_EVENT = pygame.USEREVENT + 4
+ANALYSIS_RETRY_MS = 250
+REVIEW_LABELS = ["best", "good", "inaccuracy", "mistake", "blunder"]
+REVIEW_COLORS = {
+    "best": (120, 220, 120),
+    "good": (180, 220, 180),
+    "inaccuracy": (240, 210, 90),
+    "mistake": (240, 150, 60),
+    "blunder": (240, 80, 80),
+}
+REVIEW_SUFFIXES = {"inaccuracy": "?!", "mistake": "?", "blunder": "??"}
 
 class ChessGame:
-    def __init__(self, width, height, title, fps, engine_path, level="1500"):
-        self.game_engine = GameState()
-        self.ai = ChessEngine(engine_path, level) if engine_path else None
+    def __init__(
+        self,
+        width,
+        height,
+        title,
+        fps,
+        engine_path,
+        level="1500",
+        engine=None,
+        ponder=False,
+        show_eval=False,
+        player_color=None,
+    ):
+        self.player_color = player_color
+        self.game_engine = GameState(player_color=player_color)
+        self.engine_path = engine_path
+        self.level = level
+        self.archived = False
+        self.ai = engine
+        if self.ai is None and engine_path:
+            self.ai = ChessEngine(engine_path, level, ponder=ponder)
         pygame.init()
-        self.width = width
-        self.height = height
-        self.square_size = width // 8
         self.fps = fps
-        self.screen = pygame.display.set_mode((self.width, self.height))
+        self.show_eval = show_eval and self.ai is not None
+        self.set_geometry(min(width, height) // 8)
+        screen_size = (self.width, self.height)
+        if self.show_eval:
+            screen_size = (self.width + EVAL_BAR_WIDTH, self.height + PV_HEIGHT)
+        self.screen = pygame.display.set_mode(screen_size, pygame.RESIZABLE)
         pygame.display.set_caption(title)
         self.clock = pygame.time.Clock()
         self.light_color = (220, 235, 255)
         self.dark_color = (100, 149, 237)
-        self.pieces = self.load_pieces()
+        self.piece_images = self.load_pieces()
+        self.sprite_cache = OrderedDict()
         self.textf = pygame.font.Font(None, 30)
         self.big_font = pygame.font.Font(None, 80)
+        self.small_font = pygame.font.Font(None, 20)
         self.selected_square = ()
         self.player_clicks = []
         self.promotion_pending = None
         self.game_over = False
+        self.engine_error = ""
+        self.search_id = 0
+        self.ai_thinking = False
+        self.analysis_id = 0
+        self.analysing = False
+        self.evaluation = None
+        self.pv_text = ""
+        self.review = None
+        self.review_results = []
+        self.choice = self.game_engine.player_color
+        self.board_layers = {}
+        self.full_redraw = True
+        self.dirty_squares = set()
+        self.eval_dirty = False
+        pygame.event.set_blocked(pygame.MOUSEMOTION)
         try:
             self.move_sound = pygame.mixer.Sound(os.path.join(ASSETS_DIR, "move.wav"))
         except:
@@ -53,24 +112,68 @@ class ChessGame:
             "K_w": os.path.join(ASSETS_DIR, "Chess_klt60.png"),
             "K_b": os.path.join(ASSETS_DIR, "Chess_kdt60.png"),
         }
-        loaded = {}
-        for name, path in piece_paths.items():
-            image = pygame.image.load(path).convert_alpha()
-            loaded[name] = pygame.transform.smoothscale(image, (90, 90))
-        return loaded
+        return {
+            name: pygame.image.load(path).convert_alpha()
+            for name, path in piece_paths.items()
+        }
+
+    @property
+    def pieces(self):
+        size = self.square_size - 2 * self.piece_offset
+        sprites = self.sprite_cache.get(size)
+        if sprites is None:
+            sprites = {
+                name: pygame.transform.smoothscale(image, (size, size))
+                for name, image in self.piece_images.items()
+            }
+            self.sprite_cache[size] = sprites
+            while len(self.sprite_cache) > SPRITE_CACHE_SIZE:
+                self.sprite_cache.popitem(last=False)
+        else:
+            self.sprite_cache.move_to_end(size)
+        return sprites
+
+    def set_geometry(self, square_size):
+        self.square_size = max(MIN_SQUARE_SIZE, square_size)
+        self.width = self.height = self.square_size * 8
+        self.piece_offset = self.square_size // 20
+        self.dot_radius = self.square_size * 3 // 20
+
+    def resize(self, width, height):
+        if self.show_eval:
+            width -= EVAL_BAR_WIDTH
+            height -= PV_HEIGHT
+        square_size = max(MIN_SQUARE_SIZE, min(width, height) // 8)
+        if square_size != self.square_size:
+            self.set_geometry(square_size)
+            self.board_layers.clear()
+        self.screen = pygame.display.get_surface()
+        self.full_redraw = True
     
+    def board_layer(self):
+        key = (self.choice, self.square_size)
+        layer = self.board_layers.get(key)
+        if layer is None:
+            layer = pygame.Surface((self.square_size * 8, self.square_size * 8))
+            for row in range(8):
+                for col in range(8):
+                    color = (
+                        self.light_color if (row + col) % 2 == 0 else self.dark_color
+                    )
+                    rect = (
+                        col * self.square_size,
+                        row * self.square_size,
+                        self.square_size,
+                        self.square_size,
+                    )
+                    pygame.draw.rect(layer, color, rect)
+            layer = layer.convert()
+            self.board_layers[key] = layer
+        return layer
+
     def draw_board(self):
         self.choice = self.game_engine.player_color
-        for row in range(8):
-            for col in range(8):
-                color = self.light_color if (row + col) % 2 == 0 else self.dark_color
-                rect = (
-                    col * self.square_size,
-                    row * self.square_size,
-                    self.square_size,
-                    self.square_size,
-                )
-                pygame.draw.rect(self.screen, color, rect)
+        self.screen.blit(self.board_layer(), (0, 0))
 
     def draw_highlights(self):
         if self.selected_square and not self.game_over:
@@ -92,11 +195,73 @@ class ChessGame:
                 pygame.draw.circle(
                     self.screen,
                     (0, 0, 255),
-                    (move_c * self.square_size + 50, move_r * self.square_size + 50),
-                    15,
+                    (
+                        move_c * self.square_size + self.square_size // 2,
+                        move_r * self.square_size + self.square_size // 2,
+                    ),
+                    self.dot_radius,
                 )
                 
+    def draw_square(self, row, col):
+        render_r, render_c = row, col
+        if self.choice == "black":
+            render_r, render_c = 7 - row, 7 - col
+        rect = pygame.Rect(
+            render_c * self.square_size,
+            render_r * self.square_size,
+            self.square_size,
+            self.square_size,
+        )
+        self.screen.blit(self.board_layer(), rect, rect)
+        if self.selected_square and not self.game_over:
+            if self.selected_square == (row, col):
+                s = pygame.Surface((self.square_size, self.square_size))
+                s.set_alpha(100)
+                s.fill((0, 150, 0))
+                self.screen.blit(s, rect.topleft)
+            if (row, col) in self.game_engine.get_legal_moves(self.selected_square):
+                pygame.draw.circle(
+                    self.screen, (0, 0, 255), rect.center, self.dot_radius
+                )
+        piece = self.game_engine.board[row][col]
+        if piece != "--":
+            sprite = self.pieces.get(f"{piece [1 ]}_{piece [0 ]}")
+            if sprite:
+                offset = self.piece_offset
+                self.screen.blit(sprite, (rect.x + offset, rect.y + offset))
+        return rect
+
+    def mark_selection_dirty(self):
+        if self.selected_square:
+            self.dirty_squares.add(self.selected_square)
+            self.dirty_squares.update(
+                self.game_engine.get_legal_moves(self.selected_square)
+            )
+
+    def render(self):
+        if self.full_redraw or self.review or self.game_over:
+            self.screen.fill((30, 30, 30))
+            self.draw_board()
+            self.draw_highlights()
+            self.draw_pieces()
+            if self.show_eval:
+                self.draw_eval_bar()
+            if self.review:
+                self.draw_review()
+            elif self.game_over:
+                self.draw_game_over()
+            pygame.display.update()
+        else:
+            rects = [self.draw_square(row, col) for row, col in self.dirty_squares]
+            if self.eval_dirty and self.show_eval:
+                rects.extend(self.draw_eval_bar())
+            pygame.display.update(rects)
+        self.full_redraw = False
+        self.dirty_squares.clear()
+        self.eval_dirty = False
+
     def draw_pieces(self, exclude_square=None):
+        pieces = self.pieces
         for row in range(8):
             for col in range(8):
                 if (row, col) == exclude_square:
@@ -104,13 +269,16 @@ class ChessGame:
                 piece = self.game_engine.board[row][col]
                 if piece != "--":
                     key = f"{piece [1 ]}_{piece [0 ]}"
-                    if key in self.pieces:
+                    if key in pieces:
                         r, c = (
                             (row, col) if self.choice == "white" else (7 - row, 7 - col)
                         )
                         self.screen.blit(
-                            self.pieces[key],
-                            (c * self.square_size + 5, r * self.square_size + 5),
+                            pieces[key],
+                            (
+                                c * self.square_size + self.piece_offset,
+                                r * self.square_size + self.piece_offset,
+                            ),
                         )
 
     def animate_move(self, start, end):
@@ -130,18 +298,60 @@ class ChessGame:
         if piece == "--":
             return
         piece_image = self.pieces[f"{piece [1 ]}_{piece [0 ]}"]
+        self.draw_board()
+        self.draw_highlights()
+        self.draw_pieces(exclude_square=start)
+        background = self.screen.copy()
+        previous = None
         for frame in range(frame_count + 1):
             r = render_r1 + dr * frame / frame_count
             c = render_c1 + dc * frame / frame_count
-            self.draw_board()
-            self.draw_highlights()
-            self.draw_pieces(exclude_square=start)
-            self.screen.blit(
-                piece_image, (c * self.square_size + 5, r * self.square_size + 5)
+            sprite = piece_image.get_rect(
+                topleft=(
+                    c * self.square_size + self.piece_offset,
+                    r * self.square_size + self.piece_offset,
+                )
             )
-            pygame.display.update()
+            dirty = sprite if previous is None else sprite.union(previous)
+            self.screen.blit(background, dirty, dirty)
+            self.screen.blit(piece_image, sprite)
+            pygame.display.update(dirty)
+            previous = sprite
             self.clock.tick(self.fps)
 
+    def draw_eval_bar(self):
+        bar = pygame.Rect(self.width, 0, EVAL_BAR_WIDTH, self.height)
+        pygame.draw.rect(self.screen, (40, 40, 40), bar)
+        white_share = 0.5
+        label = ""
+        if self.evaluation is not None:
+            if self.evaluation.is_mate():
+                mate = self.evaluation.mate()
+                white_share = 1.0 if mate > 0 else 0.0
+                label = f"M{abs(mate)}"
+            else:
+                centipawns = self.evaluation.score()
+                white_share = 1 / (1 + 10 ** (-centipawns / 400))
+                label = f"{abs(centipawns) / 100:.1f}"
+        white_height = int(self.height * white_share)
+        if self.choice == "white":
+            white_top = self.height - white_height
+        else:
+            white_top = 0
+        white_rect = (self.width, white_top, EVAL_BAR_WIDTH, white_height)
+        pygame.draw.rect(self.screen, (235, 235, 235), white_rect)
+        if label:
+            text = self.small_font.render(label, True, (120, 120, 120))
+            center = (self.width + EVAL_BAR_WIDTH // 2, self.height // 2)
+            self.screen.blit(text, text.get_rect(center=center))
+        strip = pygame.Rect(0, self.height, self.width + EVAL_BAR_WIDTH, PV_HEIGHT)
+        pygame.draw.rect(self.screen, (30, 30, 30), strip)
+        if self.pv_text:
+            text = self.textf.render(self.pv_text, True, (220, 220, 220))
+            midleft = (10, self.height + PV_HEIGHT // 2)
+            self.screen.blit(text, text.get_rect(midleft=midleft))
+        return [bar, strip]
+
     def draw_game_over(self):
         overlay = pygame.Surface((self.width, self.height))
         overlay.set_alpha(150)
@@ -157,23 +367,294 @@ class ChessGame:
         )
         sub_rect = sub_surface.get_rect(center=(self.width // 2, self.height // 2 + 30))
         self.screen.blit(sub_surface, sub_rect)
+        if self.engine_error:
+            error_surface = self.small_font.render(
+                self.engine_error, True, (255, 120, 120)
+            )
+            error_rect = error_surface.get_rect(
+                center=(self.width // 2, self.height // 2 + 90)
+            )
+            self.screen.blit(error_surface, error_rect)
+        if self.ai and self.engine_path and self.ai.board.move_stack:
+            review_surface = self.textf.render(
+                "Press V to review the game", True, (255, 255, 255)
+            )
+            review_rect = review_surface.get_rect(
+                center=(self.width // 2, self.height // 2 + 60)
+            )
+            self.screen.blit(review_surface, review_rect)
+
+    def draw_review(self):
+        overlay = pygame.Surface((self.width, self.height))
+        overlay.set_alpha(210)
+        overlay.fill((0, 0, 0))
+        self.screen.blit(overlay, (0, 0))
+        title = self.big_font.render("Game Review", True, (255, 255, 255))
+        self.screen.blit(title, title.get_rect(center=(self.width // 2, 50)))
+        if self.review.done():
+            progress = "Review complete"
+        else:
+            progress = (
+                f"Analysing... {self.review.completed}/"
+                f"{len(self.review.positions)} positions"
+            )
+        text = self.textf.render(progress, True, (200, 200, 200))
+        self.screen.blit(text, text.get_rect(center=(self.width // 2, 100)))
+        counts = {
+            color: {label: 0 for label in REVIEW_LABELS}
+            for color in ("white", "black")
+        }
+        for result in self.review_results:
+            counts[result["color"]][result["label"]] += 1
+        y = 140
+        for col, label in enumerate(REVIEW_LABELS):
+            x = self.width * (2 * col + 3) // 12
+            text = self.small_font.render(label.title(), True, REVIEW_COLORS[label])
+            self.screen.blit(text, text.get_rect(center=(x, y)))
+            for row, color in enumerate(("white", "black")):
+                text = self.textf.render(
+                    str(counts[color][label]), True, (255, 255, 255)
+                )
+                self.screen.blit(text, text.get_rect(center=(x, y + 30 + row * 30)))
+        for row, color in enumerate(("White", "Black")):
+            text = self.textf.render(color, True, (255, 255, 255))
+            self.screen.blit(text, text.get_rect(midleft=(20, y + 30 + row * 30)))
+        y += 110
+        errors = sorted(
+            (
+                result
+                for result in self.review_results
+                if result["label"] in REVIEW_SUFFIXES
+            ),
+            key=lambda result: result["ply"],
+        )
+        for result in errors:
+            if y > self.height - 70:
+                break
+            number = result["ply"] // 2 + 1
+            dots = "." if result["color"] == "white" else "..."
+            line = (
+                f"{number}{dots} {result['san']}{REVIEW_SUFFIXES[result['label']]}"
+                f"  -{result['loss'] / 100:.1f}"
+            )
+            if result["best"]:
+                line += f"   best was {result['best']}"
+            text = self.textf.render(line, True, REVIEW_COLORS[result["label"]])
+            self.screen.blit(text, (40, y))
+            y += 28
+        text = self.textf.render("Click anywhere to restart", True, (255, 255, 255))
+        center = (self.width // 2, self.height - 30)
+        self.screen.blit(text, text.get_rect(center=center))
+
+    def play_move(self, start, end):
+        target_piece = self.game_engine.board[end[0]][end[1]]
+        moving_piece = self.game_engine.board[start[0]][start[1]]
+        is_en_passant = (
+            moving_piece[1] == "P" and start[1] != end[1] and target_piece == "--"
+        )
+        is_capture = target_piece != "--" or is_en_passant
+        self.cancel_analysis()
+        self.animate_move(start, end)
+        before = [row[:] for row in self.game_engine.board]
+        self.game_engine.move_piece(start, end)
+        self.dirty_squares.update(
+            (r, c)
+            for r in range(8)
+            for c in range(8)
+            if before[r][c] != self.game_engine.board[r][c]
+        )
+        if self.ai:
+            self.ai.push_move(start, end)
+        if is_capture and self.capture_sound:
+            self.capture_sound.play()
+        elif self.move_sound:
+            self.move_sound.play()
+        if self.game_engine.checkmate():
+            loser = self.game_engine.turn
+            self.finish_game("0-1" if loser == "white" else "1-0", "checkmate")
+        elif self.game_engine.stalemate():
+            self.finish_game("1/2-1/2", "stalemate")
+        elif self.game_engine.threefold_repetition():
+            self.finish_game("1/2-1/2", "threefold repetition")
+
+    def engine_failed(self, error):
+        self.engine_error = f"Engine error: {error}"[:80]
+        self.finish_game("*", "engine failure")
+
+    def finish_game(self, result, termination):
+        self.game_over = True
+        self.full_redraw = True
+        self.archive_game(result, termination, wait=False)
+
+    def archive_game(self, result, termination, wait=True):
+        if self.archived or not self.ai or not self.ai.board.move_stack:
+            return
+        self.archived = True
+        args = (
+            self.ai.board.copy(),
+            self.level,
+            self.game_engine.player_color,
+            result,
+            termination,
+        )
+        thread = threading.Thread(target=self.save_game, args=args)
+        thread.start()
+        if wait:
+            thread.join()
+
+    def save_game(self, *args):
+        try:
+            save_game(*args)
+        except Exception:
+            pass
+
+    def start_ai_search(self):
+        self.search_id += 1
+        self.ai_thinking = True
+        threading.Thread(
+            target=self.ai_worker, args=(self.search_id,), daemon=True
+        ).start()
+
+    def ai_worker(self, search_id):
+        error = "no move returned"
+        try:
+            start, end = self.ai.get_best_move()
+        except Exception as e:
+            start, end = None, None
+            error = str(e) or type(e).__name__
+        try:
+            pygame.event.post(
+                pygame.event.Event(
+                    AI_MOVE_EVENT,
+                    search_id=search_id,
+                    start=start,
+                    end=end,
+                    error=error,
+                )
+            )
+        except pygame.error:
+            pass
+
+    def start_analysis(self):
+        self.analysis_id += 1
+        analysis_id = self.analysis_id
+
+        def on_info(score, pv):
+            try:
+                pygame.event.post(
+                    pygame.event.Event(
+                        EVAL_EVENT, analysis_id=analysis_id, score=score, pv=pv
+                    )
+                )
+            except pygame.error:
+                pass
+
+        self.analysing = self.ai.start_analysis(on_info)
+        if not self.analysing:
+            pygame.time.set_timer(ANALYSIS_RETRY_EVENT, ANALYSIS_RETRY_MS, 1)
+
+    def cancel_analysis(self):
+        if self.analysing:
+            self.analysis_id += 1
+            self.analysing = False
+            self.ai.stop_analysis(wait=False)
+
+    def start_review(self):
+        self.review_results = []
+        self.full_redraw = True
+
+        def on_result(result):
+            try:
+                pygame.event.post(pygame.event.Event(REVIEW_EVENT, result=result))
+            except pygame.error:
+                pass
+
+        self.review = GameReview(self.engine_path, self.ai.board, on_result)
+
+    def cancel_review(self):
+        if self.review:
+            self.review.cancel()
+            self.review = None
+            self.review_results = []
+
+    def cancel_ai_search(self):
+        if self.ai_thinking:
+            self.search_id += 1
+            self.ai_thinking = False
+            self.ai.stop()
 
     def run(self):
         while True:
-            for event in pygame.event.get():
+            if self.full_redraw or self.dirty_squares or self.eval_dirty:
+                events = pygame.event.get()
+            else:
+                events = [pygame.event.wait()] + pygame.event.get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     if self.ai:
+                        self.archive_game("*", "abandoned")
+                        self.cancel_review()
+                        self.cancel_analysis()
+                        self.cancel_ai_search()
                         self.ai.quit()
                     pygame.quit()
+                    return
+                elif event.type == AI_MOVE_EVENT:
+                    if event.search_id != self.search_id:
+                        continue
+                    self.ai_thinking = False
+                    if self.game_over:
+                        continue
+                    if event.start and event.end:
+                        self.play_move(event.start, event.end)
+                    else:
+                        self.engine_failed(event.error)
+                elif event.type == REVIEW_EVENT:
+                    if self.review:
+                        self.review_results.append(event.result)
+                        self.full_redraw = True
+                elif event.type == EVAL_EVENT:
+                    if event.analysis_id == self.analysis_id:
+                        self.evaluation = event.score
+                        self.pv_text = event.pv
+                        self.eval_dirty = True
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.full_redraw = True
+                elif event.type == pygame.VIDEORESIZE:
+                    self.resize(event.w, event.h)
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r and not self.game_over:
-                        self.game_over = True
+                        self.cancel_analysis()
+                        self.cancel_ai_search()
+                        loser = self.game_engine.player_color
+                        self.finish_game(
+                            "0-1" if loser == "white" else "1-0", "resignation"
+                        )
+                    elif (
+                        event.key == pygame.K_v
+                        and self.game_over
+                        and not self.review
+                        and self.ai
+                        and self.engine_path
+                        and self.ai.board.move_stack
+                    ):
+                        self.start_review()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     if self.game_over:
-                        self.game_engine = GameState()
+                        self.cancel_review()
+                        self.cancel_analysis()
+                        self.cancel_ai_search()
+                        if self.ai:
+                            self.ai.new_game()
+                        self.game_engine = GameState(player_color=self.player_color)
+                        self.archived = False
+                        self.engine_error = ""
+                        self.evaluation = None
+                        self.pv_text = ""
                         self.game_over = False
                         self.selected_square = ()
                         self.player_clicks = []
+                        self.full_redraw = True
                         continue
                     if self.game_engine.turn == self.game_engine.player_color:
                         pos = pygame.mouse.get_pos()
@@ -181,8 +662,11 @@ class ChessGame:
                             pos[0] // self.square_size,
                             pos[1] // self.square_size,
                         )
+                        if not (0 <= row < 8 and 0 <= col < 8):
+                            continue
                         if self.game_engine.player_color == "black":
                             row, col = 7 - row, 7 - col
+                        self.mark_selection_dirty()
                         if self.selected_square == (row, col):
                             self.selected_square = ()
                             self.player_clicks = []
@@ -192,65 +676,24 @@ class ChessGame:
                         if len(self.player_clicks) == 2:
                             start, end = self.player_clicks
                             if end in self.game_engine.get_legal_moves(start):
-                                target_piece = self.game_engine.board[end[0]][end[1]]
-                                moving_piece = self.game_engine.board[start[0]][
-                                    start[1]
-                                ]
-                                is_en_passant = (
-                                    moving_piece[1] == "P"
-                                    and start[1] != end[1]
-                                    and target_piece == "--"
-                                )
-                                is_capture = target_piece != "--" or is_en_passant
-                                self.animate_move(start, end)
-                                self.game_engine.move_piece(start, end)
-                                if is_capture and self.capture_sound:
-                                    self.capture_sound.play()
-                                elif self.move_sound:
-                                    self.move_sound.play()
-                                if (
-                                    self.game_engine.checkmate()
-                                    or self.game_engine.stalemate()
-                                    or self.game_engine.threefold_repetition()
-                                ):
-                                    self.game_over = True
+                                self.play_move(start, end)
                             self.selected_square = ()
                             self.player_clicks = []
+                        self.mark_selection_dirty()
             if (
                 not self.game_over
                 and self.ai
+                and not self.ai_thinking
                 and self.game_engine.turn != self.game_engine.player_color
             ):
-                self.draw_board()
-                self.draw_pieces()
-                pygame.display.update()
-                fen = self.game_engine.get_fen()
-                s, e = self.ai.get_best_move(fen)
-                if s and e:
-                    target_piece_ai = self.game_engine.board[e[0]][e[1]]
-                    moving_piece_ai = self.game_engine.board[s[0]][s[1]]
-                    is_en_passant_ai = (
-                        moving_piece_ai[1] == "P"
-                        and s[1] != e[1]
-                        and target_piece_ai == "--"
-                    )
-                    is_capture_ai = target_piece_ai != "--" or is_en_passant_ai
-                    self.animate_move(s, e)
-                    self.game_engine.move_piece(s, e)
-                    if is_capture_ai and self.capture_sound:
-                        self.capture_sound.play()
-                    elif self.move_sound:
-                        self.move_sound.play()
-                    if (
-                        self.game_engine.checkmate()
-                        or self.game_engine.stalemate()
-                        or self.game_engine.threefold_repetition()
-                    ):
-                        self.game_over = True
-            self.draw_board()
-            self.draw_highlights()
-            self.draw_pieces()
-            if self.game_over:
-                self.draw_game_over()
-            pygame.display.update()
-            self.clock.tick(self.fps)
\ No newline at end of file
+                self.start_ai_search()
+            elif (
+                self.show_eval
+                and not self.game_over
+                and not self.ai_thinking
+                and not self.analysing
+            ):
+                self.start_analysis()
+            if self.full_redraw or self.dirty_squares or self.eval_dirty:
+                self.render()
+                self.clock.tick(self.fps)
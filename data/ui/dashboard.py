@@ -12,6 +12,7 @@ import queue
 from tkinter import messagebox
 from dotenv import load_dotenv
 from backend.profile_db import get_profile, save_profile
+from backend.engine import EngineManager, get_stockfish_path
 from ui.ai_chat import AIChat
 from ui.focus_timer import FocusTimerApp
 from ui.calc import CalculatorApp
@@ -36,6 +37,7 @@ class DashboardApp(ctk.CTk):
         self.tray_queue = queue.Queue()
         self.tray_icon = None
         self.tray_running = False
+        self.engine_manager = EngineManager()
         self.quotes = [
             '"Focus on being productive instead of busy."',
             '"The secret of getting ahead is getting started."',
@@ -139,6 +141,9 @@ class DashboardApp(ctk.CTk):
         self.load_assets()
         self.wellbeing_daemon = DigitalWellbeingDaemon(self.user_id)
         self.wellbeing_daemon.start()
+        stockfish_path = get_stockfish_path()
+        if os.path.exists(stockfish_path):
+            self.engine_manager.start(stockfish_path)
         self.health_tracker = DigitalWellbeingApp(self.user_id)
         btns = [
             (0, 0, self.ai_img, "AI Companion", self.open_ai_chat),
@@ -329,9 +334,12 @@ class DashboardApp(ctk.CTk):
 
     def open_chess(self):
         import backend.chess_runner as chess_runner
-        chess_runner.main()
+        chess_runner.main(self.engine_manager)
         
     def cleanup(self):
+        if hasattr(self, "wellbeing_daemon"):
+            self.wellbeing_daemon.stop()
+        self.engine_manager.shutdown()
         targets = ["backend", "ui", "."]
         for target in targets:
             pycache_path = os.path.join(target, "__pycache__")
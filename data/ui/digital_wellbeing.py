@@ -5,14 +5,26 @@ import threading
 import time
 import datetime
 import getpass
+import heapq
 import os
 import queue
+import re
+import fnmatch
 from tkinter import messagebox
 from PIL import Image
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 ASSETS_DIR = os.path.join(BASE_DIR, "assets")
 popup_queue = queue.Queue()
+WARNING_SECONDS = 120
+DEADLINE_SLACK = 0.01
+RULE_TYPES = ["App", "Group", "Glob", "Regex"]
+APP_GROUPS = {
+    "browsers": ["chrome", "google chrome", "chromium", "firefox", "msedge", "microsoft edge", "brave", "opera", "vivaldi", "safari"],
+    "games": ["steam", "steamwebhelper", "epicgameslauncher", "battle.net", "riotclientservices", "minecraft", "robloxplayerbeta"],
+    "social": ["discord", "telegram", "whatsapp", "slack", "signal", "messenger"],
+    "video": ["vlc", "netflix", "spotify", "obs64", "obs"],
+}
 
 def _import_matplotlib():
     import matplotlib.pyplot as plt
@@ -26,6 +38,107 @@ def clean_app_name(raw_name):
     name = name.replace("-", " ").replace("_", " ")
     return name.title()
 
+def rule_regex(match_type, pattern):
+    if match_type == "group":
+        names = APP_GROUPS.get(pattern.lower(), [])
+        return "|".join(re.escape(clean_app_name(name).lower()) for name in names) or "(?!)"
+    if match_type == "glob":
+        return fnmatch.translate(clean_app_name(pattern).lower())
+    if match_type == "regex":
+        return pattern
+    return re.escape(pattern.lower())
+
+def compile_rule(match_type, pattern):
+    return re.compile(f"(?:{rule_regex(match_type, pattern)})", re.IGNORECASE)
+
+def window_open(active_from, active_to, clock):
+    if not active_from or not active_to:
+        return True
+    if active_from <= active_to:
+        return active_from <= clock < active_to
+    return clock >= active_from or clock < active_to
+
+class RuleMatcher:
+    def __init__(self, rules):
+        self.rules = []
+        self.separate = []
+        alternatives = []
+        for app_name, match_type, pattern in rules:
+            try:
+                compiled = compile_rule(match_type or "app", pattern or app_name)
+            except re.error:
+                continue
+            if compiled.groups:
+                self.separate.append((app_name, compiled))
+            else:
+                self.rules.append((app_name, compiled))
+                alternatives.append(compiled.pattern)
+        self.combined = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+        self.matches = {}
+
+    def match(self, name):
+        result = self.matches.get(name)
+        if result is None:
+            result = ()
+            if self.combined is not None and self.combined.fullmatch(name):
+                result = tuple(app_name for app_name, compiled in self.rules if compiled.fullmatch(name))
+            result += tuple(app_name for app_name, compiled in self.separate if compiled.fullmatch(name))
+            self.matches[name] = result
+        return result
+
+class ProcessTracker:
+    def __init__(self, verify_every=60):
+        self.processes = {}
+        self.names = {}
+        self.verify_every = verify_every
+        self.ticks = 0
+
+    def refresh(self):
+        self.ticks += 1
+        if self.ticks % self.verify_every == 0:
+            self._verify()
+        pids = set(psutil.pids())
+        for pid in self.processes.keys() - pids:
+            self._forget(pid)
+        for pid in pids - self.processes.keys():
+            self._add(pid)
+        return self.names
+
+    def pids_for(self, app_name):
+        return [
+            (pid, self.processes[pid][0]) for pid in self.names.get(app_name, ())
+        ]
+
+    def _add(self, pid):
+        try:
+            proc = psutil.Process(pid)
+            create_time = proc.create_time()
+            name = clean_app_name(proc.name()).lower()
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return
+        except psutil.AccessDenied:
+            create_time, name = None, ""
+        self.processes[pid] = (create_time, name)
+        if name:
+            self.names.setdefault(name, set()).add(pid)
+
+    def _forget(self, pid):
+        _, name = self.processes.pop(pid)
+        pids = self.names.get(name)
+        if pids is not None:
+            pids.discard(pid)
+            if not pids:
+                del self.names[name]
+
+    def _verify(self):
+        for pid, (create_time, _) in list(self.processes.items()):
+            try:
+                if create_time is None or psutil.Process(pid).create_time() == create_time:
+                    continue
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            self._forget(pid)
+
 def init_wellbeing_db():
     with sqlite3.connect("wellbeing.db") as conn:
         conn.execute("""
@@ -47,6 +160,12 @@ def init_wellbeing_db():
                 PRIMARY KEY (user_id, app_name, date)
             )
         """)
+        cols = [c[1] for c in conn.execute("PRAGMA table_info(wellbeing_apps)").fetchall()]
+        if "match_type" not in cols:
+            conn.execute("ALTER TABLE wellbeing_apps ADD COLUMN match_type TEXT DEFAULT 'app'")
+            conn.execute("ALTER TABLE wellbeing_apps ADD COLUMN pattern TEXT")
+            conn.execute("ALTER TABLE wellbeing_apps ADD COLUMN active_from TEXT")
+            conn.execute("ALTER TABLE wellbeing_apps ADD COLUMN active_to TEXT")
 
 def get_user_running_apps():
     current_user = getpass.getuser().lower()
@@ -63,11 +182,30 @@ def get_user_running_apps():
     return sorted(list(app_list))
 
 class DigitalWellbeingDaemon:
-    def __init__(self, user_id):
+    def __init__(self, user_id, tick_interval=10, flush_interval=60):
         self.user_id = user_id
         self.db_path = "wellbeing.db"
         self.running = True
         self.warning_issued = set()
+        self.tracker = ProcessTracker()
+        self.tick_interval = tick_interval
+        self.max_gap = tick_interval * 3
+        self.last_observation = None
+        self.wakeup = threading.Event()
+        self.flush_interval = flush_interval
+        self.pending = {}
+        self.pending_date = None
+        self.last_flush = time.monotonic()
+        self.reset_date = None
+        self.limits = None
+        self.used = {}
+        self.windows = {}
+        self.rule_specs = None
+        self.matcher = RuleMatcher([])
+        self.data_version = None
+        self.deadlines = []
+        self.conn = None
+        self.lock = threading.Lock()
         init_wellbeing_db()
 
     def start(self):
@@ -75,74 +213,177 @@ class DigitalWellbeingDaemon:
 
     def stop(self):
         self.running = False
+        self.wakeup.set()
+        self.flush()
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def _connection(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(
+                self.db_path, timeout=5, check_same_thread=False
+            )
+        return self.conn
 
     def monitor_loop(self):
+        next_tick = time.monotonic() + self.tick_interval
+        self.tick()
         while self.running:
-            today = datetime.date.today().isoformat()
+            now = time.monotonic()
+            if now - next_tick > self.tick_interval:
+                next_tick = now
+            wake_at = next_tick
+            if self.deadlines:
+                wake_at = min(wake_at, self.deadlines[0][0])
+            self.wakeup.wait(max(0.0, wake_at - now))
+            if not self.running:
+                break
+            if time.monotonic() >= next_tick:
+                next_tick += self.tick_interval
+            self.tick()
+
+    def observe(self):
+        now = time.monotonic()
+        elapsed = 0.0
+        if self.last_observation is not None:
+            elapsed = now - self.last_observation
+            if elapsed > self.max_gap:
+                elapsed = self.tick_interval
+        self.last_observation = now
+        return elapsed
+
+    def tick(self):
+        today = datetime.date.today().isoformat()
+        if today != self.reset_date:
+            self.flush()
             self._reset_daily_timers(today)
-            running_apps = set()
-            for proc in psutil.process_iter(['name']):
-                try:
-                    name = proc.info.get('name')
-                    if name:
-                        running_apps.add(clean_app_name(name).lower())
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-
-            with sqlite3.connect(self.db_path) as conn:
-                tracked_apps = conn.execute(
-                    "SELECT app_name, limit_minutes, used_seconds FROM wellbeing_apps WHERE user_id=?", 
-                    (self.user_id,)
-                ).fetchall()
-
-                for app_name, limit_minutes, used_seconds in tracked_apps:
-                    app_lower = app_name.lower()
-                    if app_lower in running_apps:
-                        new_used_seconds = used_seconds + 10
-                        conn.execute(
-                            "UPDATE wellbeing_apps SET used_seconds=? WHERE app_name=? AND user_id=?",
-                            (new_used_seconds, app_name, self.user_id)
-                        )
-                        conn.execute("""
-                            INSERT INTO app_usage_history (user_id, app_name, date, used_seconds)
-                            VALUES (?, ?, ?, ?)
-                            ON CONFLICT(user_id, app_name, date) DO UPDATE SET used_seconds=?
-                        """, (self.user_id, app_name, today, new_used_seconds, new_used_seconds))
-                        conn.commit()
-                        
-                        limit_seconds = limit_minutes * 60
-                        time_left = limit_seconds - new_used_seconds
-
-                        if time_left > 120 and app_name in self.warning_issued:
-                            self.warning_issued.remove(app_name)
-
-                        if 0 < time_left <= 120 and app_name not in self.warning_issued:
-                            popup_queue.put({"type": "warning", "app": app_name})
-                            self.warning_issued.add(app_name)
-
-                        if time_left <= 0:
-                            self.kill_app(app_lower)
-            time.sleep(10)
+        running_apps = self.tracker.refresh()
+        elapsed = self.observe()
+        observed_at = self.last_observation
+        clock = datetime.datetime.now().strftime("%H:%M")
+        deadlines = []
+
+        with self.lock:
+            self._load_limits()
+            matched = {}
+            for name in running_apps:
+                for app_name in self.matcher.match(name):
+                    matched.setdefault(app_name, []).append(name)
+            for app_name, limit_seconds in self.limits.items():
+                process_names = matched.get(app_name)
+                if process_names and window_open(*self.windows[app_name], clock):
+                    self.pending[app_name] = self.pending.get(app_name, 0) + elapsed
+                    self.pending_date = today
+                    new_used_seconds = self.used.get(app_name, 0) + self.pending[app_name]
+
+                    time_left = limit_seconds - new_used_seconds
+
+                    if time_left > WARNING_SECONDS and app_name in self.warning_issued:
+                        self.warning_issued.remove(app_name)
+
+                    if 0 < time_left <= WARNING_SECONDS + DEADLINE_SLACK and app_name not in self.warning_issued:
+                        popup_queue.put({"type": "warning", "app": app_name})
+                        self.warning_issued.add(app_name)
+
+                    if time_left <= DEADLINE_SLACK:
+                        self.kill_app(app_name, process_names)
+                        continue
+                    if time_left > WARNING_SECONDS:
+                        deadlines.append((observed_at + time_left - WARNING_SECONDS, app_name))
+                    deadlines.append((observed_at + time_left, app_name))
+        heapq.heapify(deadlines)
+        self.deadlines = deadlines
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            self.last_flush = time.monotonic()
+            pending = {}
+            remainders = {}
+            for app_name, seconds in self.pending.items():
+                whole = int(seconds)
+                if whole:
+                    pending[app_name] = whole
+                if seconds > whole:
+                    remainders[app_name] = seconds - whole
+            self.pending = remainders
+            if not pending:
+                return
+            for app_name, seconds in pending.items():
+                if app_name in self.used:
+                    self.used[app_name] += seconds
+            try:
+                with self._connection() as conn:
+                    conn.executemany(
+                        "UPDATE wellbeing_apps SET used_seconds=used_seconds+? WHERE app_name=? AND user_id=?",
+                        [(seconds, app_name, self.user_id) for app_name, seconds in pending.items()],
+                    )
+                    conn.executemany("""
+                        INSERT INTO app_usage_history (user_id, app_name, date, used_seconds)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT(user_id, app_name, date) DO UPDATE SET used_seconds=used_seconds+excluded.used_seconds
+                    """, [(self.user_id, app_name, self.pending_date, seconds) for app_name, seconds in pending.items()])
+            except sqlite3.Error:
+                for app_name, seconds in pending.items():
+                    self.pending[app_name] = self.pending.get(app_name, 0) + seconds
+                    if app_name in self.used:
+                        self.used[app_name] -= seconds
+
+    def _load_limits(self):
+        conn = self._connection()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if self.limits is not None and data_version == self.data_version:
+            return
+        self.data_version = data_version
+        rows = conn.execute(
+            "SELECT app_name, limit_minutes, used_seconds, match_type, pattern, active_from, active_to FROM wellbeing_apps WHERE user_id=?",
+            (self.user_id,)
+        ).fetchall()
+        self.limits = {row[0]: row[1] * 60 for row in rows}
+        self.used = {row[0]: row[2] for row in rows}
+        self.windows = {row[0]: (row[5], row[6]) for row in rows}
+        rule_specs = sorted((row[0], row[3], row[4]) for row in rows)
+        if rule_specs != self.rule_specs:
+            self.rule_specs = rule_specs
+            self.matcher = RuleMatcher(rule_specs)
 
     def _reset_daily_timers(self, today):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "UPDATE wellbeing_apps SET used_seconds=0, last_reset_date=? WHERE last_reset_date != ?",
-                (today, today)
-            )
+        with self.lock:
+            with self._connection() as conn:
+                cursor = conn.execute(
+                    "UPDATE wellbeing_apps SET used_seconds=0, last_reset_date=? WHERE last_reset_date != ?",
+                    (today, today)
+                )
             if cursor.rowcount > 0:
                 self.warning_issued.clear()
+            self.limits = None
+        self.reset_date = today
 
-    def kill_app(self, target_app_name):
+    def kill_app(self, target_app_name, process_names=None):
         killed = False
-        for proc in psutil.process_iter(['name']):
-            try:
-                name = proc.info.get('name')
-                if name and clean_app_name(name).lower() == target_app_name:
-                    proc.kill()
-                    killed = True
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+        current_user = getpass.getuser().lower()
+        protected = {os.getpid()}
+        try:
+            protected.update(parent.pid for parent in psutil.Process().parents())
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            protected.add(os.getppid())
+        for process_name in process_names or [target_app_name.lower()]:
+            for pid, create_time in self.tracker.pids_for(process_name):
+                if pid in protected:
+                    continue
+                try:
+                    proc = psutil.Process(pid)
+                    proc_user = proc.username()
+                    if not proc_user or current_user not in proc_user.lower():
+                        continue
+                    if proc.create_time() == create_time:
+                        proc.kill()
+                        killed = True
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
         if killed:
             popup_queue.put({"type": "killed", "app": target_app_name})
 
@@ -277,11 +518,35 @@ class DigitalWellbeingApp(ctk.CTkToplevel):
         self.limit_entry = ctk.CTkEntry(input_frame, placeholder_text="Mins", width=60)
         self.limit_entry.grid(row=0, column=2, padx=5)
         ctk.CTkButton(input_frame, text="Add", width=60, command=self.add_app_limit).grid(row=0, column=3, padx=5)
+        rule_frame = ctk.CTkFrame(tab, fg_color="transparent")
+        rule_frame.pack()
+        self.rule_type_var = ctk.StringVar(value="App")
+        ctk.CTkOptionMenu(rule_frame, variable=self.rule_type_var, values=RULE_TYPES, width=90, command=self.change_rule_type).grid(row=0, column=0, padx=5)
+        self.pattern_entry = ctk.CTkEntry(rule_frame, placeholder_text="Pattern, e.g. *chrome*", width=200, state="disabled")
+        self.pattern_entry.grid(row=0, column=1, padx=5)
+        self.from_entry = ctk.CTkEntry(rule_frame, placeholder_text="From HH:MM", width=90)
+        self.from_entry.grid(row=0, column=2, padx=5)
+        self.to_entry = ctk.CTkEntry(rule_frame, placeholder_text="To HH:MM", width=90)
+        self.to_entry.grid(row=0, column=3, padx=5)
         self.limits_frame = ctk.CTkScrollableFrame(tab)
         self.limits_frame.pack(fill="both", expand=True, pady=10)
         self.trigger_refresh()
         self.load_limits()
 
+    def change_rule_type(self, rule_type):
+        self.pattern_entry.configure(state="normal" if rule_type in ["Glob", "Regex"] else "disabled")
+        if rule_type == "Group":
+            groups = [group.title() for group in APP_GROUPS]
+            self.app_dropdown.configure(values=groups, state="normal")
+            self.app_var.set(groups[0])
+            self.refresh_btn.configure(state="disabled")
+        elif rule_type == "App":
+            self.app_dropdown.configure(state="normal")
+            self.trigger_refresh()
+        else:
+            self.app_dropdown.configure(state="disabled")
+            self.refresh_btn.configure(state="disabled")
+
     def trigger_refresh(self):
         self.refresh_btn.configure(state="disabled", text="Scanning...")
         self.app_var.set("Scanning...")
@@ -290,6 +555,9 @@ class DigitalWellbeingApp(ctk.CTkToplevel):
 
     def _perform_refresh(self):
         apps = get_user_running_apps()
+        if self.rule_type_var.get() != "App":
+            self.refresh_btn.configure(text="Refresh Apps")
+            return
         if apps:
             self.app_dropdown.configure(values=apps)
             self.app_var.set(apps[0])
@@ -299,18 +567,48 @@ class DigitalWellbeingApp(ctk.CTkToplevel):
         self.refresh_btn.configure(state="normal", text="Refresh Apps")
 
     def add_app_limit(self):
+        match_type = self.rule_type_var.get().lower()
         app_name = self.app_var.get()
+        pattern = None
         limit_str = self.limit_entry.get()
-        if app_name in ["No apps found", "Scanning..."] or not limit_str.isdigit():
+        if match_type in ["glob", "regex"]:
+            pattern = app_name = self.pattern_entry.get().strip()
+        elif match_type == "group":
+            pattern = app_name.lower()
+        if not app_name or app_name in ["No apps found", "Scanning..."] or not limit_str.isdigit():
+            return
+        if match_type == "regex":
+            try:
+                compile_rule(match_type, pattern)
+            except re.error as e:
+                messagebox.showerror("Invalid Pattern", f"Regex error: {e}", parent=self)
+                return
+        active_from = self.from_entry.get().strip() or None
+        active_to = self.to_entry.get().strip() or None
+        try:
+            for value in (active_from, active_to):
+                if value:
+                    datetime.datetime.strptime(value, "%H:%M")
+        except ValueError:
+            messagebox.showerror("Invalid Time", "Use HH:MM for the active window, e.g. 09:00.", parent=self)
             return
+        if bool(active_from) != bool(active_to):
+            messagebox.showerror("Invalid Time", "Set both ends of the active window or neither.", parent=self)
+            return
+        if active_from:
+            active_from = datetime.datetime.strptime(active_from, "%H:%M").strftime("%H:%M")
+            active_to = datetime.datetime.strptime(active_to, "%H:%M").strftime("%H:%M")
         limit = int(limit_str)
         today = datetime.date.today().isoformat()
         with sqlite3.connect("wellbeing.db") as conn:
             conn.execute("""
-                INSERT OR REPLACE INTO wellbeing_apps (user_id, app_name, limit_minutes, used_seconds, last_reset_date)
-                VALUES (?, ?, ?, COALESCE((SELECT used_seconds FROM wellbeing_apps WHERE user_id=? AND app_name=?), 0), ?)
-            """, (self.user_id, app_name, limit, self.user_id, app_name, today))
+                INSERT OR REPLACE INTO wellbeing_apps (user_id, app_name, limit_minutes, used_seconds, last_reset_date, match_type, pattern, active_from, active_to)
+                VALUES (?, ?, ?, COALESCE((SELECT used_seconds FROM wellbeing_apps WHERE user_id=? AND app_name=?), 0), ?, ?, ?, ?, ?)
+            """, (self.user_id, app_name, limit, self.user_id, app_name, today, match_type, pattern, active_from, active_to))
         self.limit_entry.delete(0, 'end')
+        self.pattern_entry.delete(0, 'end')
+        self.from_entry.delete(0, 'end')
+        self.to_entry.delete(0, 'end')
         self.load_limits()
 
     def load_limits(self):
@@ -318,8 +616,8 @@ class DigitalWellbeingApp(ctk.CTkToplevel):
             w.destroy()
         self.app_widgets = {}
         with sqlite3.connect("wellbeing.db") as conn:
-            limits = conn.execute("SELECT app_name, limit_minutes, used_seconds FROM wellbeing_apps WHERE user_id=?", (self.user_id,)).fetchall()
-        for app_name, limit_minutes, used_seconds in limits:
+            limits = conn.execute("SELECT app_name, limit_minutes, used_seconds, match_type, pattern, active_from, active_to FROM wellbeing_apps WHERE user_id=?", (self.user_id,)).fetchall()
+        for app_name, limit_minutes, used_seconds, match_type, pattern, active_from, active_to in limits:
             row = ctk.CTkFrame(self.limits_frame)
             row.pack(fill="x", pady=5)
             mins_used = used_seconds // 60
@@ -334,6 +632,17 @@ class DigitalWellbeingApp(ctk.CTkToplevel):
             info_frame = ctk.CTkFrame(row, fg_color="transparent")
             info_frame.pack(side="left", fill="both", expand=True, padx=10, pady=10)
             ctk.CTkLabel(info_frame, text=app_name, font=("Arial", 16, "bold")).pack(anchor="w")
+            details = []
+            if match_type and match_type != "app":
+                details.append(match_type.title())
+            if active_from and active_to:
+                details.append(f"{active_from}–{active_to}")
+            try:
+                compile_rule(match_type or "app", pattern or app_name)
+            except re.error:
+                details.append("invalid pattern, not enforced")
+            if details:
+                ctk.CTkLabel(info_frame, text=" · ".join(details), text_color="gray", font=("Arial", 12)).pack(anchor="w")
             pb_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
             pb_frame.pack(fill="x", pady=(5, 0))
             pb = ctk.CTkProgressBar(pb_frame, progress_color=p_color, height=12)
@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from ui.board import ChessGame
+
+
+def full_frame(game):
+    game.draw_board()
+    game.draw_highlights()
+    game.draw_pieces()
+    pygame.display.update()
+
+
+def bench_full_frames(game, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        full_frame(game)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def bench_animation(game, moves, start=(6, 4), end=(4, 4)):
+    frames_per_move = (abs(end[0] - start[0]) + abs(end[1] - start[1])) * 3 + 1
+    began = time.perf_counter()
+    for _ in range(moves):
+        game.animate_move(start, end)
+    return (time.perf_counter() - began) * 1000 / (moves * frames_per_move)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Frame-time benchmark for the chess board renderer"
+    )
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--moves", type=int, default=100)
+    parser.add_argument("--size", type=int, default=800)
+    args = parser.parse_args(argv)
+    game = ChessGame(
+        args.size,
+        args.size,
+        "Chess benchmark",
+        0,
+        engine_path=None,
+        player_color="white",
+    )
+    game.selected_square = (6, 4)
+    full_frame(game)
+    full_ms = bench_full_frames(game, args.frames)
+    animation_ms = bench_animation(game, args.moves)
+    print(f"driver     {pygame.display.get_driver()}")
+    print(f"full frame      {full_ms:7.3f} ms")
+    print(f"animation frame {animation_ms:7.3f} ms")
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())